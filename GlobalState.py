@@ -1,5 +1,6 @@
-from typing import Annotated, List, TypedDict, Union, Dict, Any
+from typing import Annotated, List, TypedDict, Union, Dict, Any, Optional
 from langchain_core.messages import AnyMessage
+from langchain_core.documents import Document
 from langgraph.graph import add_messages, MessagesState
 
 class GlobalState(MessagesState):
@@ -8,9 +9,12 @@ class GlobalState(MessagesState):
   query: str
   context : str
   generation: Union[str, List[Any]]
-  documents: List[str]
+  documents: List[Document]
   summary: str
   config: Dict[str, Any] = {}
   user_info: Dict[str,Any] = {}
   api: str = ""
-  api_intent: str = ""
\ No newline at end of file
+  api_intent: str = ""
+  cache_hit: bool = False
+  prompt_tokens: Optional[int] = 0
+  prefetch_id: str = ""
\ No newline at end of file
@@ -1,35 +1,70 @@
-from graphbuilder import workflow
+from graphbuilder import get_compiled_graph, release_compiled_graphs
+from rag_agent import answer_cache, METADATA_FILTER_ENABLED
+from rag_retriever_chroma import topic_predictor
+from speculative_retrieval import prefetcher
+from llm_registry import registry
+from stream_events import stream_graph_events
+from metrics import metrics_handler, render_metrics
+from batch_runner import run_batch, DEFAULT_MAX_CONCURRENCY, DEFAULT_BACKEND_CONCURRENCY
 from fastapi import FastAPI, status, HTTPException, Depends
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from typing import List
 from fastapi.concurrency import run_in_threadpool
 from langchain_core.messages import HumanMessage
 from contextlib import asynccontextmanager
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from sqlite_checkpointer import PooledSqliteSaver
+from checkpoint_retention import CheckpointRetention, RETENTION_ENABLED
+from background_summarizer import BackgroundSummarizer
 import asyncio
-import aiosqlite
+import json
+import os
+
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "db/thread_id_memory.db")
 
 
 async def init_memory():
-    conn = await aiosqlite.connect("db/thread_id_memory.db")
-    return AsyncSqliteSaver(conn)
+    return await PooledSqliteSaver.create(CHECKPOINT_DB_PATH)
 
 class AppInput(BaseModel):
     thread_id: str = Field("1", description="Thread ID for the current user session.")
     query: str = Field(..., description="User query for the SalarySe assistant.")
+
+class BatchInput(BaseModel):
+    items: List[AppInput] = Field(..., description="Queries to run, each with its own thread ID.")
+    max_concurrency: int = Field(DEFAULT_MAX_CONCURRENCY, ge=1, description="Maximum number of queries processed at once.")
+    bedrock_concurrency: int = Field(DEFAULT_BACKEND_CONCURRENCY["bedrock"], ge=1, description="Maximum concurrent Bedrock calls.")
+    ollama_concurrency: int = Field(DEFAULT_BACKEND_CONCURRENCY["ollama"], ge=1, description="Maximum concurrent Ollama calls.")
     
 memory = None
+ss_agent = None
+retention = None
+summarizer = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Handles the startup and shutdown of the SQLite connection."""
-    global memory
-    print("Opening SQLite connection.")
+    """Handles the startup and shutdown of the pooled SQLite checkpointer, its retention task, the compiled graph, the background summarizer and topic predictor training."""
+    global memory, ss_agent, retention, summarizer
+    print("Opening SQLite connections.")
     memory = await init_memory()  
+    ss_agent = get_compiled_graph(checkpointer=memory)
+    summarizer = BackgroundSummarizer(ss_agent, callbacks=[metrics_handler])
+    if METADATA_FILTER_ENABLED:
+        # Topic centroids are computed off the request path; RAG queries run unfiltered until they are ready.
+        topic_predictor.refresh()
+    retention = CheckpointRetention(memory)
+    if RETENTION_ENABLED:
+        retention.start()
     try:
         yield
     finally:
-        print("Closing SQLite connection.")
-        await memory.conn.close()
+        print("Closing SQLite connections.")
+        await retention.stop()
+        await summarizer.aclose()
+        release_compiled_graphs(memory)
+        ss_agent = None
+        await memory.aclose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -40,8 +75,14 @@ async def get_memory():
         raise HTTPException(status_code=500, detail="Memory not initialized.")
     return memory
 
+async def get_agent():
+    """Dependency to provide the graph compiled once at startup."""
+    if ss_agent is None:
+        raise HTTPException(status_code=500, detail="Agent graph not initialized.")
+    return ss_agent
+
 @app.post("/ask", status_code=status.HTTP_201_CREATED)
-async def ask_agent(input: AppInput, memory=Depends(get_memory)):
+async def ask_agent(input: AppInput, ss_agent=Depends(get_agent)):
     """
     Endpoint to query the SalarySe assistant.
 
@@ -55,11 +96,12 @@ async def ask_agent(input: AppInput, memory=Depends(get_memory)):
         "messages": [HumanMessage(content=input.query)],
         "query": input.query
     }
-    config = {"configurable": {"thread_id": input.thread_id}}
+    config = {"configurable": {"thread_id": input.thread_id}, "callbacks": [metrics_handler]}
 
     try:
-        ss_agent = workflow.compile(checkpointer=memory)
-        response = await ss_agent.ainvoke(query_payload, config=config)
+        async with summarizer.thread_lock(input.thread_id):
+            response = await ss_agent.ainvoke(query_payload, config=config)
+        summarizer.schedule(input.thread_id)
 
         if (response and 
             isinstance(response, dict) and 
@@ -77,4 +119,88 @@ async def ask_agent(input: AppInput, memory=Depends(get_memory)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request."
-        )
\ No newline at end of file
+        )
+
+@app.get("/rag/cache/stats")
+async def rag_cache_stats():
+    """Hit/miss counters and size of the RAG semantic answer cache."""
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
+
+@app.get("/rag/prefetch/stats")
+async def rag_prefetch_stats():
+    """Speculative retrieval counters: prefetches claimed by the RAG agent, latency saved and work wasted."""
+    return prefetcher.stats()
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    """Shared LLM clients and per-model limiter counters (active, waiting, queued, throttled calls)."""
+    return registry.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-node latency, LLM latency and token histograms by node and backend, in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/memory/stats")
+async def memory_stats(memory=Depends(get_memory)):
+    """Size and row counts of the checkpoint DB, retention counters, checkpoint writer batching and background summaries."""
+    return {**await retention.astats(), "writer": memory.stats(), "summarizer": summarizer.stats()}
+
+
+@app.post("/ask/stream")
+async def ask_agent_stream(input: AppInput, ss_agent=Depends(get_agent)):
+    """
+    Streaming variant of `/ask` over Server-Sent Events.
+
+    Emits `route`, `retrieval`, `token`, and finally `done` (or `error`) events as the graph runs.
+    Closing the connection cancels the graph run.
+
+    Args:
+        input (AppInput): The input containing the thread ID and user query.
+
+    Returns:
+        StreamingResponse: `text/event-stream` of graph events.
+    """
+    async def events():
+        async with summarizer.thread_lock(input.thread_id):
+            async for frame in stream_graph_events(ss_agent, input.query, input.thread_id, callbacks=[metrics_handler]):
+                yield frame
+        summarizer.schedule(input.thread_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask/batch")
+async def ask_agent_batch(input: BatchInput, ss_agent=Depends(get_agent)):
+    """
+    Run many queries concurrently under global and per-backend concurrency caps.
+
+    Args:
+        input (BatchInput): The queries and concurrency limits.
+
+    Returns:
+        StreamingResponse: Newline-delimited JSON, one result per query in completion order.
+        Each line carries the query's `index` and either `response` or `error`.
+    """
+    async def results():
+        async for result in run_batch(
+            [(item.thread_id, item.query) for item in input.items],
+            graph=ss_agent,
+            max_concurrency=input.max_concurrency,
+            backend_concurrency={"bedrock": input.bedrock_concurrency, "ollama": input.ollama_concurrency},
+            summarizer=summarizer,
+            callbacks=[metrics_handler],
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,47 @@
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+from functools import lru_cache
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from GlobalState import GlobalState
+from api_catalog import build_resolver
+
+resolver = build_resolver()
+
+
+@lru_cache(maxsize=None)
+def build_api_agent(product: str):
+    """
+    Build the API worker agent for a product of the API catalog.
+
+    The agent resolves the query to one of the product's endpoints with the catalog resolver
+    (keyword/embedding match, LLM only on ties) and stores it under the `api` key.
+
+    Args:
+        product (str): Product name in `api_catalog.yaml`, e.g. "credit_card".
+
+    Returns:
+        CompiledStateGraph: Single-node subgraph; the node is named after the product.
+    """
+    async def api_node(state: GlobalState) -> GlobalState:
+        query = state.get("query")
+        user_info = state.get("user_info", {})
+        user_id = user_info.get("user_id", "")
+
+        user_id = "740ad7d0-0b8c-4bde-a861-a97a5f2d3f52"
+
+        api = await resolver.aresolve(query, product, {**user_info, "user_id": user_id})
+
+        updated_state = state.copy()
+        updated_state["api"] = api.strip()
+        updated_state["messages"] = [AIMessage(content="API provided".strip())]
+        return updated_state
+
+    workflow = StateGraph(GlobalState)
+    workflow.add_node(product, api_node)
+    workflow.set_entry_point(product)
+    workflow.add_edge(product, END)
+    return workflow.compile()
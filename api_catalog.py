@@ -0,0 +1,194 @@
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from dotenv import load_dotenv, find_dotenv
+from llm_registry import get_llm
+import numpy as np
+import asyncio
+import yaml
+import os
+import re
+
+load_dotenv(find_dotenv())
+
+catalog_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_catalog.yaml")
+
+NO_API_FOUND = "No API Found"
+KEYWORD_WEIGHT = float(os.getenv("API_RESOLVER_KEYWORD_WEIGHT", "0.1"))
+TIE_MARGIN = float(os.getenv("API_RESOLVER_TIE_MARGIN", "0.05"))
+
+
+class ApiEndpoint(TypedDict):
+    name: str
+    endpoint: str
+    description: str
+    keywords: List[str]
+    parameters: List[str]
+    examples: List[str]
+
+
+class ApiProduct(TypedDict):
+    routing: str
+    endpoints: List[ApiEndpoint]
+
+
+def load_catalog(path: str = catalog_path) -> Dict[str, ApiProduct]:
+    """Load the product API catalog (product name -> routing description and endpoints)."""
+    with open(path) as f:
+        products = yaml.safe_load(f)["products"]
+    for product in products.values():
+        for endpoint in product["endpoints"]:
+            endpoint.setdefault("keywords", [])
+            endpoint.setdefault("parameters", [])
+            endpoint.setdefault("examples", [])
+    return products
+
+
+catalog = load_catalog()
+
+
+def agent_name(product: str) -> str:
+    """Graph node name of a product's API agent."""
+    return f"{product}_agent"
+
+
+def product_examples(label: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Example queries per product agent, for training routers on catalog products.
+
+    With `label`, every product's examples go under that one label instead (e.g. the manager's
+    `api_supervisor_agent`).
+    """
+    examples = {agent_name(product): [example for endpoint in spec["endpoints"] for example in endpoint["examples"]]
+                for product, spec in catalog.items()}
+    return {label: [example for queries in examples.values() for example in queries]} if label else examples
+
+
+def routing_instructions() -> str:
+    """Prompt lines telling a router which product agent handles which queries."""
+    return "\n".join(f'- If {spec["routing"]}, respond with "{agent_name(product)}".' for product, spec in catalog.items())
+
+
+resolver_llm = get_llm("bedrock", "meta.llama3-8b-instruct-v1:0", temperature=0)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class ApiResolver:
+    """
+    Deterministic endpoint resolution over the API catalog.
+
+    Endpoints are scored by cosine similarity between the query and their description/examples,
+    plus `keyword_weight` per matched keyword. The best endpoint is returned directly unless other
+    endpoints score within `tie_margin` of it; only then is the LLM asked to pick among the tied ones.
+    """
+
+    def __init__(self, embeddings, products: Dict[str, ApiProduct], llm=None,
+                 keyword_weight: float = KEYWORD_WEIGHT, tie_margin: float = TIE_MARGIN):
+        self.embeddings = embeddings
+        self.products = products
+        self.llm = llm
+        self.keyword_weight = keyword_weight
+        self.tie_margin = tie_margin
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._patterns = {
+            endpoint["name"]: [re.compile(r"\b" + re.escape(keyword.lower()) + r"\b") for keyword in endpoint["keywords"]]
+            for product in products.values() for endpoint in product["endpoints"]
+        }
+        self._lock = asyncio.Lock()
+
+    async def _aembed_catalog(self) -> None:
+        async with self._lock:
+            if self._vectors:
+                return
+            for product in self.products.values():
+                for endpoint in product["endpoints"]:
+                    texts = [endpoint["description"]] + endpoint["examples"]
+                    self._vectors[endpoint["name"]] = _normalize(np.asarray(await self.embeddings.aembed_documents(texts), dtype=np.float32))
+
+    async def ascore(self, query: str, endpoints: List[ApiEndpoint]) -> List[float]:
+        """Score each endpoint for the query (similarity + keyword bonus)."""
+        lowered = query.lower()
+        keyword_scores = [self.keyword_weight * sum(bool(p.search(lowered)) for p in self._patterns[e["name"]]) for e in endpoints]
+        if self.embeddings is None:
+            return keyword_scores
+
+        await self._aembed_catalog()
+        vector = _normalize(np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32))
+        return [float(np.max(self._vectors[e["name"]] @ vector)) + keyword_score
+                for e, keyword_score in zip(endpoints, keyword_scores)]
+
+    async def _allm_pick(self, query: str, candidates: List[Tuple[str, str]]) -> str:
+        prompt = PromptTemplate(
+            template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+            You are an AI assistant representing SalarySe, a professional organization.
+            Your primary role is to provide api access to the user queries.
+
+            You have knowledge about the apis listed below:
+            {apis}
+
+            based on the query you have to decide which api to call.
+
+            **Your response should be formatted as a Json object with a key 'api' and the value as the name of the api or 'No API Found' if no api is found.**
+
+            Query: {query}
+            Response:
+            <|eot_id|><|start_header_id|>assistant<|end_header_id|>""",
+            input_variables=["query", "apis"]
+        )
+        chain = prompt | self.llm | JsonOutputParser()
+        try:
+            apis = "\n".join(f"{i}.'{url}'. {description}" for i, (url, description) in enumerate(candidates, 1))
+            response = await chain.ainvoke({"query": query, "apis": apis})
+            api = str(response.get("api", NO_API_FOUND)).strip()
+        except Exception as e:
+            print(f"API resolver LLM tie-break failed: {str(e)}")
+            return NO_API_FOUND
+        return api if api in {url for url, _ in candidates} else NO_API_FOUND
+
+    async def aresolve(self, query: str, product: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Resolve a query to a concrete endpoint URL.
+
+        Args:
+            query (str): The user query.
+            product (str): Restrict resolution to one catalog product; all endpoints if None.
+            parameters (dict): Values for `{placeholders}` in endpoints, e.g. `user_id`.
+
+        Returns:
+            str: The endpoint with parameters filled in, or "No API Found".
+        """
+        parameters = parameters or {}
+        products = [self.products[product]] if product else list(self.products.values())
+        endpoints = [endpoint for spec in products for endpoint in spec["endpoints"]]
+        if not endpoints:
+            return NO_API_FOUND
+
+        def render(endpoint: ApiEndpoint) -> str:
+            return endpoint["endpoint"].format(**{name: parameters.get(name, "") for name in endpoint["parameters"]})
+
+        if len(endpoints) == 1:
+            return render(endpoints[0])
+
+        try:
+            scores = await self.ascore(query, endpoints)
+        except Exception as e:
+            print(f"API resolver scoring failed: {str(e)}")
+            scores = [0.0] * len(endpoints)
+
+        best = max(scores)
+        tied = [endpoint for endpoint, score in zip(endpoints, scores) if best - score < self.tie_margin]
+        if len(tied) == 1:
+            return render(tied[0])
+        if self.llm is None:
+            return render(tied[0])
+        return await self._allm_pick(query, [(render(e), e["description"]) for e in tied])
+
+
+def build_resolver() -> ApiResolver:
+    """Create the catalog resolver backed by the shared Nomic embeddings and the Bedrock tie-break LLM."""
+    from rag_retriever_chroma import embeddings
+    return ApiResolver(embeddings, catalog, llm=resolver_llm)
@@ -1,25 +1,25 @@
 from GlobalState import GlobalState
+from llm_registry import get_llm
+from intent_router import build_router
 from langchain_core.messages import RemoveMessage, AIMessage, HumanMessage, SystemMessage
 from dotenv import load_dotenv, find_dotenv
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-from langchain_aws import ChatBedrock
 from langchain_core.prompts import PromptTemplate
 from langgraph.graph import END
-from api_agents.investment_agent import investment_agent
-from api_agents.credit_card_agent import credit_card_agent
-from api_agents.credit_score_agent import credit_score_agent
-from api_agents.dashboard_agent import dashboard_agent
+from api_agents.catalog_agent import build_api_agent
+from api_catalog import catalog, agent_name, product_examples, routing_instructions
 import asyncio
 from langgraph.graph import START, StateGraph, END
 
-api_supervisor_llm = ChatBedrock(credentials_profile_name="default",
-                          model_id="meta.llama3-8b-instruct-v1:0",
-                          model_kwargs=dict(temperature=0))
+api_supervisor_llm = get_llm("bedrock", "meta.llama3-8b-instruct-v1:0", temperature=0)
 
+fast_router = build_router("api_supervisor", extra_examples=product_examples())
+
+api_agents = {agent_name(product): build_api_agent(product) for product in catalog}
 
-async def api_supervisor(state: GlobalState) -> GlobalState:
-    query = state.get("query", "")
 
+async def llm_api_route(query: str) -> str:
+    """Route an API query to a product agent with the Bedrock supervisor prompt."""
     manager_prompt = PromptTemplate(
         template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
         You are a multi-agent AI assistant for the company SalarySe.
@@ -27,13 +27,10 @@ async def api_supervisor(state: GlobalState) -> GlobalState:
         The worker agents specialize in different api executions.
         Your task is to decide query routing based on its content.
         
-        - If the query is about credit cards, respond with "credit_card_agent".
-        - If the query is about user's personal data or information, respond with "dashboard_agent".
-        - If the query is about investment, respond with "investment_agent".
-        - If the query is about user's credit score, respond with "credit_score_agent".
+        {routing_instructions}
         - For any other cases, respond with "END" if you cannot determine a specific action.
 
-        **Respond only with a single word: "credit_card_agent", "dashboard_agent", "investment_agent", "credit_score_agent", or "END".** 
+        **Respond only with a single word: {agent_names}, or "END".** 
         Do not provide any extra explanation or context.
         
 
@@ -41,6 +38,8 @@ async def api_supervisor(state: GlobalState) -> GlobalState:
         Answer:
         <|eot_id|><|start_header_id|>assistant<|end_header_id|>""",
         input_variables=["query", "messages"],
+        partial_variables={"routing_instructions": routing_instructions(),
+                           "agent_names": ", ".join(f'"{name}"' for name in api_agents)},
     )
 
 
@@ -51,10 +50,26 @@ async def api_supervisor(state: GlobalState) -> GlobalState:
     except Exception as e:
         response = "END"
 
-    valid_responses = {"credit_card_agent", "dashboard_agent", "investment_agent", "credit_score_agent", "END"}
+    valid_responses = {*api_agents, "END"}
     if response not in valid_responses:
         response = "END" 
 
+    return response
+
+
+async def api_supervisor(state: GlobalState) -> GlobalState:
+    query = state.get("query", "")
+
+    response = None
+    if fast_router is not None:
+        try:
+            response = await fast_router.aroute(query)
+        except Exception as e:
+            print(f"Fast router failed, falling back to LLM: {str(e)}")
+
+    if response is None:
+        response = await llm_api_route(query)
+
     updated_state = {
         "api_intent": response
     }
@@ -70,27 +85,18 @@ def api_intent_classifier(state: GlobalState) -> str:
 
 workflow = StateGraph(GlobalState)
 workflow.add_node("api_supervisor", api_supervisor)
-workflow.add_node("credit_card_agent", credit_card_agent)
-workflow.add_node("credit_score_agent", credit_score_agent)
-workflow.add_node("investment_agent",investment_agent)
-workflow.add_node("dashboard_agent", dashboard_agent)
+for name, agent in api_agents.items():
+    workflow.add_node(name, agent)
+    workflow.add_edge(name, END)
 workflow.set_entry_point("api_supervisor")
 
 workflow.add_conditional_edges(
     "api_supervisor",
     api_intent_classifier,
-    {"credit_card_agent": "credit_card_agent",
-     "credit_score_agent": "credit_score_agent",
-     "investment_agent": "investment_agent",
-     "dashboard_agent": "dashboard_agent",
+    {**{name: name for name in api_agents},
      "END": END}
 )
 
-workflow.add_edge("credit_card_agent", END)
-workflow.add_edge("credit_score_agent", END)
-workflow.add_edge("investment_agent", END)
-workflow.add_edge("dashboard_agent", END)
-
 api_supervisor_agent = workflow.compile()
 
 
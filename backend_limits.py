@@ -0,0 +1,46 @@
+from contextvars import ContextVar
+from typing import Dict, Optional
+from langchain_core.runnables import RunnableLambda
+import asyncio
+
+
+# Per-backend semaphores for the current run. Set by callers such as the batch runner; when unset,
+# LLM calls are not limited.
+backend_semaphores: ContextVar[Optional[Dict[str, asyncio.Semaphore]]] = ContextVar("backend_semaphores", default=None)
+
+
+def limit_backend(llm, backend: str, limiter=None):
+    """
+    Wrap a chat model so its async calls wait on the semaphore registered for `backend`, and all
+    calls go through the model's `limiter`.
+
+    The wrapped model behaves exactly like the original (including token streaming through
+    callbacks) when no semaphores are set in the current context.
+
+    Args:
+        llm: Chat model to wrap.
+        backend (str): Backend name the model runs on, e.g. "bedrock" or "ollama".
+        limiter (ModelLimiter): Process-wide limiter of the model (see `llm_registry`), applied
+            after the per-run semaphore. Sync calls use its blocking `run_sync`.
+
+    Returns:
+        Runnable: The rate-limited model.
+    """
+    def invoke(input, config):
+        if limiter is None:
+            return llm.invoke(input, config)
+        return limiter.run_sync(lambda: llm.invoke(input, config))
+
+    async def ainvoke(input, config):
+        if limiter is None:
+            return await llm.ainvoke(input, config)
+        return await limiter.run(lambda: llm.ainvoke(input, config))
+
+    async def ainvoke_limited(input, config):
+        semaphore = (backend_semaphores.get() or {}).get(backend)
+        if semaphore is None:
+            return await ainvoke(input, config)
+        async with semaphore:
+            return await ainvoke(input, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke_limited, name=f"{backend}_llm")
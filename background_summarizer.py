@@ -0,0 +1,99 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from langchain_core.runnables import RunnableLambda
+from summarize_coversations import summarize_conversations, summarization_intent, SUMMARY_MODE
+import asyncio
+
+
+class BackgroundSummarizer:
+    """
+    Runs conversation summarization after the response instead of before routing.
+
+    `schedule(thread_id)` starts a task that loads the thread's latest checkpoint, folds the old
+    messages into the summary if the history is long enough, and writes the result back to the
+    checkpoint with `aupdate_state` (as the `summarize_conversations` node). The next turn then
+    starts from the already-summarized state.
+
+    Graph runs and summary jobs of the same thread are serialized through `thread_lock`: a request
+    waits for a running summary of its thread to be written, and a summary job waits for a running
+    request, so neither overwrites the other's checkpoint. At most one job per thread is queued;
+    scheduling again while one is waiting is a no-op, since that job reads the latest state anyway.
+
+    When disabled (inline mode), `thread_lock` does not lock and `schedule` does nothing.
+    `callbacks` are passed to each summary run, which carries the node's `langgraph_node`
+    metadata like the inline node does.
+    """
+
+    def __init__(self, graph, enabled: bool = SUMMARY_MODE == "background", callbacks: Optional[List[Any]] = None):
+        self.graph = graph
+        self.enabled = enabled
+        self.callbacks = callbacks or []
+        self._locks: Dict[str, List[Any]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {"scheduled": 0, "coalesced": 0, "summarized": 0, "skipped": 0, "failed": 0}
+
+    @asynccontextmanager
+    async def thread_lock(self, thread_id: str) -> AsyncIterator[None]:
+        """Hold the thread's lock; the lock is dropped once nobody holds or waits for it."""
+        if not self.enabled:
+            yield
+            return
+        entry = self._locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[thread_id]
+
+    def schedule(self, thread_id: str) -> Optional[asyncio.Task]:
+        """Summarize the thread in the background once its current holder releases it."""
+        if not self.enabled:
+            return None
+        if thread_id in self._pending:
+            self.counters["coalesced"] += 1
+            return self._pending[thread_id]
+        task = asyncio.create_task(self._run(thread_id))
+        self._pending[thread_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.counters["scheduled"] += 1
+        return task
+
+    async def _run(self, thread_id: str) -> None:
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            async with self.thread_lock(thread_id):
+                # From here on this job may miss newer messages, so later schedule() calls start a new one.
+                self._pending.pop(thread_id, None)
+                snapshot = await self.graph.aget_state(config)
+                values = snapshot.values or {}
+                if summarization_intent(values) != "summarize_conversations":
+                    self.counters["skipped"] += 1
+                    return
+                update = await RunnableLambda(summarize_conversations).ainvoke(values, config={
+                    "run_name": "summarize_conversations",
+                    "callbacks": self.callbacks,
+                    "metadata": {"langgraph_node": "summarize_conversations", "thread_id": thread_id},
+                })
+                if not update:
+                    self.counters["failed"] += 1
+                    return
+                await self.graph.aupdate_state(config, update, as_node="summarize_conversations")
+                self.counters["summarized"] += 1
+        except Exception as e:
+            if self._pending.get(thread_id) is asyncio.current_task():
+                del self._pending[thread_id]
+            self.counters["failed"] += 1
+            print(f"Background summarization failed for thread {thread_id}: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Wait for scheduled summaries so they are written before the checkpointer closes."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"mode": "background" if self.enabled else "inline", "pending": len(self._tasks), **self.counters}
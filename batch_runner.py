@@ -0,0 +1,100 @@
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from langchain_core.messages import HumanMessage
+from dotenv import load_dotenv, find_dotenv
+from backend_limits import backend_semaphores
+from stream_events import final_response
+from contextlib import nullcontext
+import traceback
+import asyncio
+import os
+
+load_dotenv(find_dotenv())
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+DEFAULT_BACKEND_CONCURRENCY = {
+    "bedrock": int(os.getenv("BATCH_BEDROCK_CONCURRENCY", "8")),
+    "ollama": int(os.getenv("BATCH_OLLAMA_CONCURRENCY", "2")),
+}
+
+
+async def run_batch(
+    items: Iterable[Tuple[str, str]],
+    graph=None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    backend_concurrency: Optional[Dict[str, int]] = None,
+    summarizer=None,
+    callbacks: Optional[List[Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run many `(thread_id, query)` pairs through the agent graph concurrently.
+
+    At most `max_concurrency` graph runs are in flight at once, and LLM calls are further capped
+    per backend (Bedrock vs. Ollama). Items sharing a thread_id run one after another in input
+    order so they don't race on the same checkpoint. A failing item is logged with its traceback
+    and yields a generic `error` entry with the exception's class name as `error_type` instead of
+    aborting the batch.
+
+    Args:
+        items: `(thread_id, query)` pairs.
+        graph: Compiled agent graph; defaults to the graph compiled from `graphbuilder.workflow`.
+        max_concurrency (int): Global cap on concurrent graph runs.
+        backend_concurrency (dict): Cap on concurrent LLM calls per backend name.
+        summarizer (BackgroundSummarizer): If given, each item holds its thread lock while it runs
+            and schedules the thread's summary afterwards.
+        callbacks (list): Callback handlers for every graph run, e.g. `metrics.metrics_handler`.
+
+    Yields:
+        dict: `{"index", "thread_id", "response"[, "api"]}` or `{"index", "thread_id", "error",
+        "error_type"}`, in completion order.
+    """
+    if graph is None:
+        from graphbuilder import get_compiled_graph
+        graph = get_compiled_graph()
+
+    limits = {**DEFAULT_BACKEND_CONCURRENCY, **(backend_concurrency or {})}
+    semaphores = {backend: asyncio.Semaphore(limit) for backend, limit in limits.items()}
+    run_semaphore = asyncio.Semaphore(max_concurrency)
+    thread_locks: Dict[str, asyncio.Lock] = {}
+
+    async def run_item(index: int, thread_id: str, query: str) -> Dict[str, Any]:
+        backend_semaphores.set(semaphores)
+        lock = thread_locks.setdefault(thread_id, asyncio.Lock())
+        query_payload = {
+            "messages": [HumanMessage(content=query)],
+            "query": query
+        }
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": callbacks or []}
+        try:
+            async with lock, run_semaphore, summarizer.thread_lock(thread_id) if summarizer else nullcontext():
+                response = await graph.ainvoke(query_payload, config=config)
+            if summarizer:
+                summarizer.schedule(thread_id)
+            return {"index": index, "thread_id": thread_id, **final_response(response or {})}
+        except Exception as e:
+            print(f"Error processing batch item {index}: {str(e)}\n{traceback.format_exc()}")
+            return {"index": index, "thread_id": thread_id,
+                    "error": "An error occurred while processing your request.",
+                    "error_type": type(e).__name__}
+
+    tasks = [asyncio.create_task(run_item(index, str(thread_id), query))
+             for index, (thread_id, query) in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    queries = [
+        ("1", "How do i check my credit card application status?"),
+        ("2", "RBL card blocked"),
+        ("3", "How are you today?"),
+    ]
+
+    async def main():
+        async for result in run_batch(queries, max_concurrency=2):
+            print(result)
+
+    asyncio.run(main())
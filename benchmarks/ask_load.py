@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import httpx
+from intent_router import load_examples
+from summarize_coversations import SUMMARY_TRIGGER_MESSAGES, SUMMARY_MODE
+from llm_registry import LLM_BACKEND
+
+eval_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_eval.yaml")
+INTENT_ALIASES = {"rag": "rag_agent", "chat": "chat_agent", "api": "api_supervisor_agent"}
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)] if values else 0.0
+
+
+def latency_summary(values: list) -> dict:
+    return {"count": len(values), "p50_ms": round(statistics.median(values), 1) if values else 0.0,
+            "p95_ms": round(percentile(values, 0.95), 1), "p99_ms": round(percentile(values, 0.99), 1)}
+
+
+def parse_mix(text: str) -> dict:
+    """`rag=0.4,chat=0.3,api=0.3` -> intent label to weight."""
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        mix[INTENT_ALIASES.get(name.strip(), name.strip())] = float(weight)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return ""
+
+
+class Workload:
+    """
+    Picks the thread and query of each request.
+
+    A request starts a new conversation with probability `new_ratio` (or when every known thread
+    is busy); otherwise it continues an idle known thread, so one thread never has two requests in
+    flight. Queries are drawn from the labeled eval set by the intent `mix`.
+    """
+
+    def __init__(self, queries: dict, mix: dict, new_ratio: float, seed: int):
+        self.queries = queries
+        self.intents = [intent for intent in mix if queries.get(intent)]
+        self.weights = [mix[intent] for intent in self.intents]
+        self.new_ratio = new_ratio
+        self.rng = random.Random(seed)
+        self.turns = {}
+        self.busy = set()
+
+    def query(self, intent: str = None) -> tuple:
+        intent = intent or self.rng.choices(self.intents, self.weights)[0]
+        return intent, self.rng.choice(self.queries[intent])
+
+    def acquire_thread(self) -> str:
+        idle = [thread for thread in self.turns if thread not in self.busy]
+        if not idle or self.rng.random() < self.new_ratio:
+            thread = f"bench-{uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]}"
+            self.turns[thread] = 0
+        else:
+            thread = self.rng.choice(idle)
+        self.busy.add(thread)
+        return thread
+
+    def release_thread(self, thread: str) -> None:
+        self.turns[thread] += 1
+        self.busy.discard(thread)
+
+
+async def memory_stats(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/memory/stats")
+    response.raise_for_status()
+    stats = response.json()
+    return {key: stats.get(key) for key in ("file_bytes", "db_bytes", "checkpoints", "writes", "threads")}
+
+
+async def ask(client, workload: Workload, thread: str, intent: str, query: str, route_of) -> dict:
+    history = "new" if workload.turns[thread] == 0 else "returning"
+    if 2 * workload.turns[thread] + 1 > SUMMARY_TRIGGER_MESSAGES:
+        history = "long"
+    start = time.perf_counter()
+    try:
+        response = await client.post("/ask", json={"thread_id": thread, "query": query})
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    latency = (time.perf_counter() - start) * 1000
+    route = (await route_of(thread) if ok and route_of else None) or intent
+    return {"latency_ms": latency, "ok": ok, "intent": intent, "route": route, "history": history}
+
+
+async def drive(client, workload: Workload, requests: int, concurrency: int, route_of) -> tuple:
+    records = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            thread = workload.acquire_thread()
+            intent, query = workload.query()
+            try:
+                records.append(await ask(client, workload, thread, intent, query, route_of))
+            finally:
+                workload.release_thread(thread)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return records, time.perf_counter() - start
+
+
+async def seed_long_threads(client, workload: Workload, threads: int, turns: int) -> None:
+    """Give `threads` conversations `turns` turns of history before measuring, so they hit summarization."""
+    async def conversation():
+        thread = f"bench-long-{uuid.UUID(int=workload.rng.getrandbits(128)).hex[:12]}"
+        workload.turns[thread] = 0
+        for _ in range(turns):
+            _, query = workload.query()
+            await client.post("/ask", json={"thread_id": thread, "query": query})
+            workload.turns[thread] += 1
+
+    await asyncio.gather(*(conversation() for _ in range(threads)))
+
+
+def report(records: list, elapsed: float) -> dict:
+    ok = [r for r in records if r["ok"]]
+    result = {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency": latency_summary([r["latency_ms"] for r in ok]),
+    }
+    for key in ("route", "intent", "history"):
+        groups = {}
+        for r in ok:
+            groups.setdefault(r[key], []).append(r["latency_ms"])
+        result[f"by_{key}"] = {name: latency_summary(values) for name, values in sorted(groups.items())}
+    return result
+
+
+def reset_shared_state() -> None:
+    """
+    Reset the process-wide singletons that outlive a re-import of ai_app.
+
+    Otherwise later concurrency levels would mostly hit the RAG answer cache warmed by the earlier
+    ones, and the prefetcher and limiter counters would span runs.
+    """
+    from rag_agent import answer_cache
+    from speculative_retrieval import prefetcher
+    from llm_registry import registry
+    if answer_cache is not None:
+        answer_cache.clear()
+        answer_cache.hits = answer_cache.misses = 0
+    prefetcher.reset()
+    registry.reset_stats()
+
+
+async def run(args, concurrency: int, queries: dict, mix: dict) -> dict:
+    workload = Workload(queries, mix, args.new_ratio, args.seed)
+
+    async def measure(client, route_of):
+        await seed_long_threads(client, workload, args.long_threads, args.history_turns)
+        before = await memory_stats(client)
+        records, elapsed = await drive(client, workload, args.requests, concurrency, route_of)
+        after = await memory_stats(client)
+        result = {"concurrency": concurrency, **report(records, elapsed), "db_before": before, "db_after": after,
+                  "db_growth": {key: (after[key] or 0) - (before[key] or 0) for key in after}}
+        result["db_bytes_per_request"] = round(result["db_growth"]["file_bytes"] / max(len(records), 1), 1)
+        return result
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            return await measure(client, None)
+
+    import ai_app
+    reset_shared_state()
+
+    async def route_of(thread: str) -> str:
+        state = await ai_app.ss_agent.aget_state({"configurable": {"thread_id": thread}})
+        return state.values.get("intent")
+
+    async with ai_app.app.router.lifespan_context(ai_app.app):
+        transport = httpx.ASGITransport(app=ai_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await measure(client, route_of)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of POST /ask: throughput, per-route latency percentiles and checkpoint DB growth.")
+    parser.add_argument("--url", help="Drive a running server over HTTP (e.g. http://localhost:8000) instead of the app in-process.")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 8, 32], help="Concurrent clients; one run per value.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per run.")
+    parser.add_argument("--mix", default="rag=0.4,chat=0.3,api=0.3", help="Intent mix over the labeled eval queries.")
+    parser.add_argument("--new-ratio", type=float, default=0.3, help="Share of requests that start a new conversation.")
+    parser.add_argument("--long-threads", type=int, default=10, help="Conversations seeded with history before measuring.")
+    parser.add_argument("--history-turns", type=int, default=4, help="Turns of history per seeded conversation.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    queries = load_examples("manager", eval_path)
+    mix = parse_mix(args.mix)
+    results = []
+    for concurrency in args.concurrency:
+        with tempfile.TemporaryDirectory() as tmp:
+            if not args.url:
+                # Every in-process run starts from an empty checkpoint DB.
+                os.environ["CHECKPOINT_DB_PATH"] = os.path.join(tmp, "checkpoints.db")
+                sys.modules.pop("ai_app", None)
+            result = asyncio.run(run(args, concurrency, queries, mix))
+        results.append(result)
+        latency = result["latency"]
+        print(f"concurrency={concurrency:<4} {result['throughput_rps']:7.2f} req/s  errors={result['errors']}  "
+              f"p50/p95/p99={latency['p50_ms']}/{latency['p95_ms']}/{latency['p99_ms']} ms  "
+              f"db +{result['db_growth']['file_bytes'] / 1024:.0f} KiB ({result['db_bytes_per_request']:.0f} B/request)")
+        for route, stats in result["by_route"].items():
+            print(f"    {route:<22} n={stats['count']:<5} p50/p95/p99={stats['p50_ms']}/{stats['p95_ms']}/{stats['p99_ms']} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"commit": git_commit(), "llm_backend": LLM_BACKEND or "default", "summary_mode": SUMMARY_MODE,
+                       "args": vars(args), "runs": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import aiosqlite
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from sqlite_checkpointer import PooledSqliteSaver
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)] if values else 0.0
+
+
+async def conversation(saver, thread_id: str, turns: int, steps: int, timings: dict) -> None:
+    """One thread: per turn, read the latest checkpoint, then write `steps` super-steps (writes + checkpoint)."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    config = await saver.aput(config, empty_checkpoint(), {"source": "input", "step": -1, "writes": {}}, {})
+    messages = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        await saver.aget_tuple({"configurable": {"thread_id": thread_id}})
+        timings["read"].append((time.perf_counter() - start) * 1000)
+
+        messages += [HumanMessage(content=f"question {turn} " * 20), AIMessage(content=f"answer {turn} " * 80)]
+        for step in range(steps):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"messages": messages, "query": f"question {turn}"}
+            start = time.perf_counter()
+            await saver.aput_writes(config, [("messages", messages[-1:])], task_id=f"{turn}-{step}")
+            config = await saver.aput(config, checkpoint, {"source": "loop", "step": step, "writes": {}}, {})
+            timings["write"].append((time.perf_counter() - start) * 1000)
+
+
+async def run(backend: str, threads: int, turns: int, steps: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        if backend == "pooled":
+            saver = await PooledSqliteSaver.create(path, readers=readers)
+        else:
+            saver = AsyncSqliteSaver(await aiosqlite.connect(path))
+
+        timings = {"read": [], "write": []}
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(saver, f"thread-{i}", turns, steps, timings) for i in range(threads)))
+        elapsed = time.perf_counter() - start
+
+        result = {"backend": backend, "threads": threads, "seconds": round(elapsed, 2),
+                  "ops_per_second": round((len(timings["read"]) + len(timings["write"])) / elapsed, 1)}
+        for kind, values in timings.items():
+            result[kind] = {"p50_ms": round(statistics.median(values), 2), "p95_ms": round(percentile(values, 0.95), 2),
+                            "p99_ms": round(percentile(values, 0.99), 2)}
+        if backend == "pooled":
+            result["avg_batch_size"] = round(saver.stats()["avg_batch_size"], 1)
+            await saver.aclose()
+        else:
+            await saver.conn.close()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint read/write latency under concurrent threads: single connection vs. pooled saver.")
+    parser.add_argument("--threads", type=int, nargs="*", default=[50, 200, 1000])
+    parser.add_argument("--turns", type=int, default=3, help="Conversation turns per thread.")
+    parser.add_argument("--steps", type=int, default=4, help="Checkpointed super-steps per turn.")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--backend", choices=["single", "pooled"], nargs="*", default=["single", "pooled"])
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = []
+    for threads in args.threads:
+        for backend in args.backend:
+            result = asyncio.run(run(backend, threads, args.turns, args.steps, args.readers))
+            results.append(result)
+            print(f"{backend:>6} threads={threads:<5} {result['ops_per_second']:8.1f} ops/s  "
+                  f"read p50/p95/p99={result['read']['p50_ms']}/{result['read']['p95_ms']}/{result['read']['p99_ms']} ms  "
+                  f"write p50/p95/p99={result['write']['p50_ms']}/{result['write']['p95_ms']}/{result['write']['p99_ms']} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import statistics
+import time
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from langgraph.checkpoint.memory import MemorySaver
+from graphbuilder import workflow, get_compiled_graph, release_compiled_graphs
+
+
+def time_calls(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean={statistics.mean(timings):9.4f} ms  p50={statistics.median(timings):9.4f} ms  p95={p95:9.4f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request graph setup overhead: compile per request vs. compiled graph registry.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    memory = MemorySaver()
+
+    before = time_calls(lambda: workflow.compile(checkpointer=memory), args.iterations)
+    release_compiled_graphs(memory)
+    get_compiled_graph(checkpointer=memory)
+    after = time_calls(lambda: get_compiled_graph(checkpointer=memory), args.iterations)
+
+    print(f"iterations: {args.iterations}")
+    report("compile per request", before)
+    report("registry lookup", after)
+    print(f"saved per request: {statistics.mean(before) - statistics.mean(after):.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
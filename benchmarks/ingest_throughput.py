@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import random
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from langchain_core.documents import Document
+from ingest_pipeline import run_pipeline, format_stats
+
+VOCABULARY = ("salary advance upi pin credit card scoins rewards fixed deposit investment loan kyc "
+              "onboarding referral instacash billing cycle limit transfer account privacy policy").split()
+
+
+def synthetic_documents(count: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    for index in range(count):
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+        yield Document(page_content=text, metadata={"source": "synthetic.csv", "row_index": index})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion pipeline throughput (chunks/sec) and peak RSS on a synthetic corpus.")
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=400, help="Words per document.")
+    parser.add_argument("--split-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--embed-concurrency", type=int, default=2)
+    parser.add_argument("--write-batch-size", type=int, default=512)
+    parser.add_argument("--split-only", action="store_true", help="Skip embedding and writing.")
+    args = parser.parse_args()
+
+    embeddings = None
+    if not args.split_only:
+        from langchain_nomic.embeddings import NomicEmbeddings
+        embeddings = NomicEmbeddings(model="nomic-embed-text-v1.5", inference_mode="local")
+
+    stats = asyncio.run(run_pipeline(
+        synthetic_documents(args.documents, args.words),
+        embeddings,
+        None if args.split_only else (lambda chunks, vectors: None),
+        split_workers=args.split_workers,
+        embed_batch_size=args.embed_batch_size,
+        embed_concurrency=args.embed_concurrency,
+        write_batch_size=args.write_batch_size,
+    ))
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import statistics
+import time
+import yaml
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from rag_retriever_chroma import ahybrid_search
+from context_builder import build_context
+from reranker import CrossEncoderReranker, select_top, RERANK_MODEL, RERANK_FETCH_K, RERANK_MIN_SCORE, RERANK_MIN_K, RERANK_MAX_K
+
+eval_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rerank_eval.yaml")
+
+
+def relevant(doc, terms) -> bool:
+    text = doc.page_content.lower()
+    return any(term.lower() in text for term in terms)
+
+
+async def generation_ms(query: str, documents) -> float:
+    from rag_agent import generate
+    start = time.perf_counter()
+    await generate({"query": query, "documents": documents, "messages": []})
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(label: str, rows: list) -> None:
+    def mean(key):
+        return statistics.mean(row[key] for row in rows)
+    line = (f"  {label:<10} hit={mean('hit'):6.1%}  precision={mean('precision'):6.1%}  docs={mean('docs'):4.1f}  "
+            f"context_tokens={mean('tokens'):7.1f}  rerank={mean('rerank_ms'):7.1f} ms")
+    if "generate_ms" in rows[0]:
+        line += f"  generate={mean('generate_ms'):8.1f} ms  total={mean('rerank_ms') + mean('generate_ms'):8.1f} ms"
+    print(line)
+
+
+async def evaluate(args) -> None:
+    with open(eval_path) as f:
+        eval_set = yaml.safe_load(f)["queries"]
+    reranker = CrossEncoderReranker(args.model, batch_size=args.batch_size)
+    reranker.model  # load the model before timing
+
+    baseline, reranked = [], []
+    for item in eval_set:
+        query, terms = item["query"], item["relevant"]
+        candidates = await ahybrid_search(query, k=args.fetch_k, fetch_k=max(20, args.fetch_k))
+
+        start = time.perf_counter()
+        scores = await reranker.ascore(query, candidates)
+        rerank_ms = (time.perf_counter() - start) * 1000
+        kept = [doc for doc, _ in select_top(candidates, scores, args.min_score, args.min_k, args.max_k)]
+
+        for rows, documents, elapsed in ((baseline, candidates[:args.top_k], 0.0), (reranked, kept, rerank_ms)):
+            hits = [relevant(doc, terms) for doc in documents]
+            row = {
+                "hit": float(any(hits)),
+                "precision": sum(hits) / len(hits) if hits else 0.0,
+                "docs": len(documents),
+                "tokens": build_context(documents)[1]["context_tokens"] if documents else 0,
+                "rerank_ms": elapsed,
+            }
+            if args.generate:
+                row["generate_ms"] = await generation_ms(query, documents)
+            rows.append(row)
+
+    print(f"{len(eval_set)} queries, {args.fetch_k} candidates, model {args.model}, "
+          f"min_score={args.min_score}, k in [{args.min_k}, {args.max_k}]")
+    summarize(f"top-{args.top_k}", baseline)
+    summarize("reranked", reranked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quality/latency of cross-encoder reranking on benchmarks/rerank_eval.yaml.")
+    parser.add_argument("--model", default=RERANK_MODEL)
+    parser.add_argument("--fetch-k", type=int, default=RERANK_FETCH_K, help="Candidates retrieved for reranking.")
+    parser.add_argument("--top-k", type=int, default=4, help="Documents passed to the LLM without reranking.")
+    parser.add_argument("--min-score", type=float, default=RERANK_MIN_SCORE)
+    parser.add_argument("--min-k", type=int, default=RERANK_MIN_K)
+    parser.add_argument("--max-k", type=int, default=RERANK_MAX_K)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--generate", action="store_true", help="Also time generation with the RAG LLM.")
+    asyncio.run(evaluate(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from intent_router import CentroidRouter, load_examples, merge_examples, ROUTER_MIN_SIMILARITY, ROUTER_MIN_MARGIN
+from api_catalog import product_examples
+from rag_retriever_chroma import embeddings
+from manager_agent import llm_route
+from api_manager import llm_api_route
+
+eval_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_eval.yaml")
+
+# Catalog examples the production routers are trained with (see manager_agent.py, api_manager.py).
+CATALOG_EXAMPLES = {
+    "manager": lambda: product_examples("api_supervisor_agent"),
+    "api_supervisor": lambda: product_examples(),
+}
+
+LLM_ROUTERS = {
+    "manager": lambda query: llm_route(query),
+    "api_supervisor": lambda query: llm_api_route(query),
+}
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)] if values else 0.0
+
+
+def summarize(label: str, correct: int, total: int, timings: list) -> None:
+    accuracy = correct / total if total else 0.0
+    print(f"  {label:<22} accuracy={accuracy:6.1%} ({correct}/{total})  "
+          f"p50={statistics.median(timings) if timings else 0:8.1f} ms  p95={percentile(timings, 0.95):8.1f} ms")
+
+
+async def report(router_name: str, min_similarity: float, min_margin: float, skip_llm: bool) -> None:
+    examples = merge_examples(load_examples(router_name), CATALOG_EXAMPLES[router_name]())
+    router = CentroidRouter(embeddings, examples, min_similarity=min_similarity, min_margin=min_margin)
+    await router.atrain()
+    eval_set = [(label, query) for label, queries in load_examples(router_name, eval_path).items() for query in queries]
+
+    classifier_correct, classifier_total, classifier_times = 0, 0, []
+    hybrid_correct, hybrid_times = 0, []
+    llm_correct, llm_times = 0, []
+
+    for label, query in eval_set:
+        start = time.perf_counter()
+        routed = await router.aroute(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        classifier_times.append(elapsed)
+
+        if routed is not None:
+            classifier_total += 1
+            classifier_correct += routed == label
+            hybrid_correct += routed == label
+            hybrid_times.append(elapsed)
+
+        if skip_llm:
+            continue
+
+        start = time.perf_counter()
+        llm_label = await LLM_ROUTERS[router_name](query)
+        llm_elapsed = (time.perf_counter() - start) * 1000
+        llm_times.append(llm_elapsed)
+        llm_correct += llm_label == label
+        if routed is None:
+            hybrid_correct += llm_label == label
+            hybrid_times.append(elapsed + llm_elapsed)
+
+    print(f"{router_name}: {len(eval_set)} queries, min_similarity={min_similarity}, min_margin={min_margin}")
+    print(f"  handled locally: {classifier_total}/{len(eval_set)} ({classifier_total / len(eval_set):.1%})")
+    summarize("classifier (confident)", classifier_correct, classifier_total, classifier_times)
+    if not skip_llm:
+        summarize("llm only", llm_correct, len(eval_set), llm_times)
+        summarize("classifier + fallback", hybrid_correct, len(eval_set), hybrid_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline accuracy/latency report: embedding router vs. LLM router.")
+    parser.add_argument("--router", choices=list(LLM_ROUTERS), nargs="*", default=list(LLM_ROUTERS))
+    parser.add_argument("--min-similarity", type=float, default=ROUTER_MIN_SIMILARITY)
+    parser.add_argument("--min-margin", type=float, default=ROUTER_MIN_MARGIN)
+    parser.add_argument("--skip-llm", action="store_true", help="Only evaluate the local classifier.")
+    args = parser.parse_args()
+
+    for router_name in args.router:
+        asyncio.run(report(router_name, args.min_similarity, args.min_margin, args.skip_llm))
+
+
+if __name__ == "__main__":
+    main()
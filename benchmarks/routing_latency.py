@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from langchain_core.messages import HumanMessage
+from intent_router import load_examples
+from graphbuilder import get_compiled_graph
+
+eval_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_eval.yaml")
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)] if values else 0.0
+
+
+async def run_mode(routing_mode: str, queries: list, repeat: int) -> list:
+    graph = get_compiled_graph(routing_mode=routing_mode)
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            await graph.ainvoke({"messages": [HumanMessage(content=query)], "query": query})
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency of hierarchical vs. flat routing on API-bound queries.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--all-intents", action="store_true", help="Use every eval query, not only API-bound ones.")
+    args = parser.parse_args()
+
+    examples = load_examples("manager", eval_path)
+    if args.all_intents:
+        queries = [query for group in examples.values() for query in group]
+    else:
+        queries = examples["api_supervisor_agent"]
+
+    for routing_mode in ("hierarchical", "flat"):
+        timings = asyncio.run(run_mode(routing_mode, queries, args.repeat))
+        print(f"{routing_mode:<13} n={len(timings):4d}  mean={statistics.mean(timings):8.1f} ms  "
+              f"p50={statistics.median(timings):8.1f} ms  p95={percentile(timings, 0.95):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
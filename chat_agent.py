@@ -6,6 +6,7 @@ from typing import TypedDict, List, Dict, Any
 from dotenv import load_dotenv, find_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from GlobalState import GlobalState
+from llm_registry import get_llm
 from langgraph.graph import END, StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
 import asyncio
@@ -14,9 +15,7 @@ import asyncio
 load_dotenv(find_dotenv())
 
 
-chat_llm = ChatBedrock(credentials_profile_name="default",
-                  model_id="meta.llama3-8b-instruct-v1:0",
-                  model_kwargs=dict(temperature=0.7))
+chat_llm = get_llm("bedrock", "meta.llama3-8b-instruct-v1:0", temperature=0.7)
 
 async def chat(state: GlobalState) -> GlobalState:
     
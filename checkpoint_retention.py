@@ -0,0 +1,230 @@
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv, find_dotenv
+import asyncio
+import uuid
+import time
+import os
+
+load_dotenv(find_dotenv())
+
+RETENTION_ENABLED = os.getenv("CHECKPOINT_RETENTION_ENABLED", "true").lower() == "true"
+KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+THREAD_TTL_SECONDS = float(os.getenv("CHECKPOINT_THREAD_TTL_HOURS", "168")) * 3600
+RETENTION_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_SECONDS", "600"))
+VACUUM_EVERY = int(os.getenv("CHECKPOINT_VACUUM_EVERY", "6"))
+DELETE_BATCH_SIZE = 5000
+
+# 100-ns intervals between the Gregorian epoch (UUID v6 timestamps) and the Unix epoch.
+_GREGORIAN_OFFSET = 0x01B21DD213814000
+
+# Oldest root checkpoint to keep per thread. Subgraph runs write to their own "<node>:<task_id>"
+# namespaces, so nested checkpoints are pruned by this root cutoff rather than ranked on their own.
+ROOT_CUTOFFS = """
+SELECT thread_id, checkpoint_id FROM (
+    SELECT thread_id, checkpoint_id, ROW_NUMBER() OVER (PARTITION BY thread_id ORDER BY checkpoint_id DESC) AS rank
+    FROM checkpoints WHERE checkpoint_ns = ''
+) WHERE rank = ?"""
+
+PRUNE_ORPHAN_WRITES = """
+DELETE FROM writes WHERE rowid IN (
+    SELECT w.rowid FROM writes w
+    LEFT JOIN checkpoints c
+        ON c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns AND c.checkpoint_id = w.checkpoint_id
+    WHERE c.checkpoint_id IS NULL LIMIT ?
+)"""
+
+IDLE_THREADS = "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(checkpoint_id) < ?"
+
+
+def checkpoint_id_at(timestamp: float) -> str:
+    """
+    Smallest LangGraph checkpoint ID (UUID v6) that can be created at `timestamp`.
+
+    Checkpoint IDs start with their creation time, so comparing IDs as strings compares times.
+    """
+    ticks = int(timestamp * 10_000_000) + _GREGORIAN_OFFSET
+    value = ((ticks >> 12) & 0xFFFFFFFFFFFF) << 80 | 0x6 << 76 | (ticks & 0x0FFF) << 64
+    return str(uuid.UUID(int=value))
+
+
+class CheckpointRetention:
+    """
+    Retention for the SQLite checkpoint DB.
+
+    Each run keeps only the latest `keep_last` root checkpoints of every thread, along with the
+    subgraph checkpoints written since the oldest of them, deletes
+    threads whose newest checkpoint is older than `thread_ttl_seconds`, removes writes that no
+    longer belong to a checkpoint, and every `vacuum_every` runs checkpoints the WAL and VACUUMs
+    the file. Deletes run in batches of `batch_size` rows, releasing the writer connection between
+    batches so request checkpoints are not held up.
+
+    Works with `PooledSqliteSaver` (through its writer lock) and the plain `AsyncSqliteSaver`.
+    """
+
+    def __init__(self, saver, keep_last: int = KEEP_LAST, thread_ttl_seconds: float = THREAD_TTL_SECONDS,
+                 interval_seconds: float = RETENTION_INTERVAL_SECONDS, vacuum_every: int = VACUUM_EVERY,
+                 batch_size: int = DELETE_BATCH_SIZE):
+        self.saver = saver
+        self.keep_last = max(keep_last, 1)
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.vacuum_every = vacuum_every
+        self.batch_size = batch_size
+        self.runs = 0
+        self.last_run: Dict[str, Any] = {}
+        self.totals = {"pruned_checkpoints": 0, "expired_threads": 0, "deleted_writes": 0, "vacuums": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def _connection(self):
+        await self.saver.setup()
+        async with getattr(self.saver, "writer_lock", None) or self.saver.lock:
+            yield self.saver.conn
+
+    async def _delete_batches(self, sql: str, *params) -> int:
+        deleted = 0
+        while True:
+            async with self._connection() as conn:
+                async with conn.execute(sql, (*params, self.batch_size)) as cursor:
+                    rowcount = cursor.rowcount
+                await conn.commit()
+            deleted += rowcount
+            if rowcount < self.batch_size:
+                return deleted
+
+    async def aprune_checkpoints(self) -> Dict[str, int]:
+        """
+        Delete checkpoints (of every namespace) and writes older than each thread's oldest kept root checkpoint.
+
+        The per-thread cutoffs are computed once per pass; the deletes then go thread by thread,
+        releasing the writer connection whenever about `batch_size` rows have been removed.
+        """
+        async with self._connection() as conn:
+            async with conn.execute(ROOT_CUTOFFS, (self.keep_last,)) as cursor:
+                cutoffs = [(row[0], row[1]) async for row in cursor]
+
+        deleted = {"checkpoints": 0, "writes": 0}
+        remaining = iter(cutoffs)
+        while True:
+            batch_rows = 0
+            async with self._connection() as conn:
+                for thread_id, cutoff in remaining:
+                    for table in ("checkpoints", "writes"):
+                        async with conn.execute(f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < ?",
+                                                (thread_id, cutoff)) as cursor:
+                            deleted[table] += cursor.rowcount
+                            batch_rows += cursor.rowcount
+                    if batch_rows >= self.batch_size:
+                        break
+                await conn.commit()
+            if batch_rows < self.batch_size:
+                return deleted
+
+    async def aexpire_threads(self, now: Optional[float] = None) -> int:
+        """Delete every checkpoint and write of threads idle for longer than the TTL."""
+        if self.thread_ttl_seconds <= 0:
+            return 0
+        cutoff = checkpoint_id_at((now or time.time()) - self.thread_ttl_seconds)
+        async with self._connection() as conn:
+            async with conn.execute(IDLE_THREADS, (cutoff,)) as cursor:
+                threads: List[str] = [row[0] async for row in cursor]
+
+        for start in range(0, len(threads), self.batch_size):
+            batch = threads[start:start + self.batch_size]
+            placeholders = ", ".join("?" * len(batch))
+            async with self._connection() as conn:
+                for table in ("checkpoints", "writes"):
+                    async with conn.execute(f"DELETE FROM {table} WHERE thread_id IN ({placeholders})", batch):
+                        pass
+                await conn.commit()
+        return len(threads)
+
+    async def avacuum(self) -> None:
+        """Fold the WAL into the database file and rebuild it to return freed pages to the OS."""
+        async with self._connection() as conn:
+            for sql in ("PRAGMA wal_checkpoint(TRUNCATE);", "VACUUM;", "PRAGMA wal_checkpoint(TRUNCATE);"):
+                async with conn.execute(sql) as cursor:
+                    await cursor.fetchall()
+        self.totals["vacuums"] += 1
+
+    async def arun_once(self, vacuum: bool = False) -> Dict[str, Any]:
+        """
+        Run one retention pass.
+
+        Args:
+            vacuum (bool): Also VACUUM the database after pruning.
+
+        Returns:
+            dict: Rows removed by this pass and its duration.
+        """
+        start = time.perf_counter()
+        expired_threads = await self.aexpire_threads()
+        pruned = await self.aprune_checkpoints()
+        result = {
+            "expired_threads": expired_threads,
+            "pruned_checkpoints": pruned["checkpoints"],
+            "deleted_writes": pruned["writes"] + await self._delete_batches(PRUNE_ORPHAN_WRITES),
+        }
+        if vacuum:
+            await self.avacuum()
+        for key in ("expired_threads", "pruned_checkpoints", "deleted_writes"):
+            self.totals[key] += result[key]
+
+        self.runs += 1
+        result.update(vacuumed=vacuum, seconds=round(time.perf_counter() - start, 3), finished_at=time.time())
+        self.last_run = result
+        return result
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                vacuum = self.vacuum_every > 0 and (self.runs + 1) % self.vacuum_every == 0
+                result = await self.arun_once(vacuum=vacuum)
+                print(f"Checkpoint retention: {result}")
+            except Exception as e:
+                print(f"Checkpoint retention failed: {str(e)}")
+
+    def start(self) -> None:
+        """Run retention every `interval_seconds` in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def astats(self) -> Dict[str, Any]:
+        """Database size, row counts and retention counters."""
+        async with self._connection() as conn:
+            counts = {}
+            for name, sql in (("checkpoints", "SELECT COUNT(*) FROM checkpoints"),
+                              ("writes", "SELECT COUNT(*) FROM writes"),
+                              ("threads", "SELECT COUNT(DISTINCT thread_id) FROM checkpoints"),
+                              ("page_count", "PRAGMA page_count"),
+                              ("page_size", "PRAGMA page_size"),
+                              ("freelist_count", "PRAGMA freelist_count")):
+                async with conn.execute(sql) as cursor:
+                    counts[name] = (await cursor.fetchone())[0]
+            async with conn.execute("PRAGMA database_list") as cursor:
+                path = next((row[2] for row in await cursor.fetchall() if row[1] == "main"), "")
+
+        files = [path, f"{path}-wal"] if path else []
+        return {
+            "db_bytes": counts["page_count"] * counts["page_size"],
+            "free_bytes": counts["freelist_count"] * counts["page_size"],
+            "file_bytes": sum(os.path.getsize(file) for file in files if os.path.exists(file)),
+            "checkpoints": counts["checkpoints"],
+            "writes": counts["writes"],
+            "threads": counts["threads"],
+            "retention": {
+                "keep_last": self.keep_last,
+                "thread_ttl_seconds": self.thread_ttl_seconds,
+                "runs": self.runs,
+                "last_run": self.last_run,
+                **self.totals,
+            },
+        }
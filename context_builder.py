@@ -0,0 +1,137 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from dotenv import load_dotenv, find_dotenv
+from rag_sources import TIKTOKEN_ENCODING, source_key
+import tiktoken
+import os
+import re
+
+load_dotenv(find_dotenv())
+
+CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))
+MIN_OVERLAP_CHARS = 20
+MIN_TRUNCATED_TOKENS = 50
+SEPARATOR = "\n\n"
+
+
+class WordEncoder:
+    """Offline stand-in for a tiktoken encoding: each word with its trailing whitespace is one token."""
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoder():
+    """
+    The tiktoken encoding the text splitter measures chunks with.
+
+    tiktoken downloads the encoding on first use (cached under `TIKTOKEN_CACHE_DIR`). If it cannot
+    be loaded, e.g. offline, token budgets are counted in words by `WordEncoder` instead.
+    """
+    try:
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        print(f"Could not load tiktoken encoding {TIKTOKEN_ENCODING}, counting tokens as words: {str(e)}")
+        return WordEncoder()
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoder().encode(text, disallowed_special=()))
+
+
+def _overlap(first: str, second: str, min_overlap: int = MIN_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second` (0 if shorter than `min_overlap`)."""
+    if len(first) < min_overlap or len(second) < min_overlap:
+        return 0
+    head = second[:min_overlap]
+    start = first.find(head)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(head, start + 1)
+    return 0
+
+
+def _merge_adjacent(blocks: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], int]:
+    """Merge chunks of the same source whose text overlaps end-to-start, as consecutive splitter chunks do."""
+    merges = 0
+    merged = True
+    while merged:
+        merged = False
+        for i, (key_i, text_i) in enumerate(blocks):
+            for j, (key_j, text_j) in enumerate(blocks):
+                if i == j or key_i != key_j:
+                    continue
+                overlap = _overlap(text_i, text_j)
+                if overlap:
+                    # The merged span takes the better-ranked position of the two.
+                    blocks[min(i, j)] = (key_i, text_i + text_j[overlap:])
+                    del blocks[max(i, j)]
+                    merges += 1
+                    merged = True
+                    break
+            if merged:
+                break
+    return blocks, merges
+
+
+def build_context(documents: List[Any], max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Assemble the generation context from retrieved chunks under a token budget.
+
+    Exact duplicates and chunks contained in another chunk are dropped, overlapping neighbouring
+    chunks of the same source (the splitter's `chunk_overlap`) are merged into one span, and the
+    spans are added in retrieval order until `max_tokens` is reached. The span that crosses the
+    budget is truncated if enough room is left, otherwise dropped.
+
+    Args:
+        documents (list): Retrieved chunks, best first, as Documents or plain strings.
+        max_tokens (int): Token budget of the context; `RAG_CONTEXT_MAX_TOKENS` by default.
+
+    Returns:
+        tuple: The context string, and stats (`chunks`, `duplicates`, `merged`, `spans`, `truncated`,
+            `dropped`, `context_tokens`).
+    """
+    max_tokens = CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    stats = {"chunks": len(documents), "duplicates": 0, "merged": 0, "spans": 0, "truncated": 0, "dropped": 0, "context_tokens": 0}
+
+    blocks: List[Tuple[str, str]] = []
+    for doc in documents:
+        key, text = (source_key(doc), doc.page_content) if isinstance(doc, Document) else ("", doc)
+        text = text.strip()
+        if not text or any(text in kept for _, kept in blocks):
+            stats["duplicates"] += 1
+            continue
+        before = len(blocks)
+        blocks = [(k, kept) for k, kept in blocks if kept not in text]
+        stats["duplicates"] += before - len(blocks)
+        blocks.append((key, text))
+
+    blocks, stats["merged"] = _merge_adjacent(blocks)
+
+    encoder = get_encoder()
+    separator_tokens = count_tokens(SEPARATOR)
+    parts: List[str] = []
+    used = 0
+    for _, text in blocks:
+        cost = len(encoder.encode(text, disallowed_special=())) + (separator_tokens if parts else 0)
+        if used + cost <= max_tokens:
+            parts.append(text)
+            used += cost
+            continue
+        room = max_tokens - used - (separator_tokens if parts else 0)
+        if room >= MIN_TRUNCATED_TOKENS:
+            parts.append(encoder.decode(encoder.encode(text, disallowed_special=())[:room]))
+            used += room + (separator_tokens if len(parts) > 1 else 0)
+            stats["truncated"] += 1
+        stats["dropped"] = len(blocks) - len(parts)
+        break
+
+    stats["spans"] = len(parts)
+    stats["context_tokens"] = used
+    return SEPARATOR.join(parts), stats
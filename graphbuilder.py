@@ -1,51 +1,139 @@
 from langgraph.graph import START, StateGraph, END
-from manager_agent import manager_agent, intent_classifier
+from manager_agent import manager_agent, leaf_router_agent, intent_classifier
 from langchain_core.messages import HumanMessage
-from rag_agent import rag_agent
+from rag_agent import rag_agent, retrieve_documents
+from speculative_retrieval import speculative_router, SPECULATIVE_RETRIEVAL
 from chat_agent import chat_agent
-from api_manager import api_supervisor_agent
-from api_agents.investment_agent import investment_agent
-from api_agents.credit_card_agent import credit_card_agent
-from api_agents.credit_score_agent import credit_score_agent
-from api_agents.dashboard_agent import dashboard_agent
-from summarize_coversations import summarize_conversations, summarization_intent
+from api_manager import api_supervisor_agent, api_agents
+from summarize_coversations import summarize_conversations, summarization_intent, SUMMARY_MODE
 from GlobalState import GlobalState
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 import asyncio
 import aiosqlite
+import os
 
 
-workflow = StateGraph(GlobalState)
-
-workflow.add_node("summarize_conversations", summarize_conversations)
-workflow.add_node("manager", manager_agent)
-workflow.add_node("rag_agent", rag_agent)
-workflow.add_node("chat_agent", chat_agent)
-workflow.add_node("api_supervisor_agent", api_supervisor_agent)
-
-workflow.add_conditional_edges(
-    START,
-    summarization_intent,
-    {"summarize_conversations": "summarize_conversations",
-     "manager": "manager"}
-)
-workflow.add_edge("summarize_conversations", "manager")
-workflow.add_conditional_edges(
-    "manager",
-    intent_classifier,
-    {"rag_agent": "rag_agent",
-     "chat_agent": "chat_agent",
-     "api_supervisor_agent": "api_supervisor_agent",
-     "END": END}
-)
-
-workflow.add_edge("rag_agent", END)
-workflow.add_edge("chat_agent", END)
-workflow.add_edge("api_supervisor_agent", END)
+ROUTING_MODE = os.getenv("ROUTING_MODE", "hierarchical")
+
+def build_workflow(routing_mode: str = ROUTING_MODE, summary_mode: str = SUMMARY_MODE,
+                   speculative_retrieval: bool = SPECULATIVE_RETRIEVAL) -> StateGraph:
+    """
+    Build the SalarySe agent graph.
+
+    Args:
+        routing_mode (str): "hierarchical" routes API queries manager -> api_supervisor -> product
+            agent (two routing steps); "flat" lets the manager pick the leaf agent in one step.
+        summary_mode (str): "inline" summarizes long histories before routing; "background" starts
+            at the manager and leaves summarization to `BackgroundSummarizer`, which writes its
+            result to the checkpoint as the `summarize_conversations` node.
+        speculative_retrieval (bool): Start RAG retrieval concurrently with the manager's routing
+            call; `rag_agent` reuses it when the query is routed there, otherwise it is cancelled.
+
+    Returns:
+        StateGraph: The uncompiled workflow.
+    """
+    if routing_mode not in ("hierarchical", "flat"):
+        raise ValueError(f"Unknown routing mode: {routing_mode}")
+    if summary_mode not in ("inline", "background"):
+        raise ValueError(f"Unknown summary mode: {summary_mode}")
+
+    workflow = StateGraph(GlobalState)
+
+    workflow.add_node("summarize_conversations", summarize_conversations)
+    workflow.add_node("rag_agent", rag_agent)
+    workflow.add_node("chat_agent", chat_agent)
+
+    if summary_mode == "background":
+        workflow.add_edge(START, "manager")
+        workflow.add_edge("summarize_conversations", END)
+    else:
+        workflow.add_conditional_edges(
+            START,
+            summarization_intent,
+            {"summarize_conversations": "summarize_conversations",
+             "manager": "manager"}
+        )
+        workflow.add_edge("summarize_conversations", "manager")
+
+    def router(agent):
+        if not speculative_retrieval:
+            return agent
+        return speculative_router(agent, retrieve_documents, lambda update: intent_classifier(update) == "rag_agent")
+
+    if routing_mode == "flat":
+        workflow.add_node("manager", router(leaf_router_agent))
+        for name, agent in api_agents.items():
+            workflow.add_node(name, agent)
+            workflow.add_edge(name, END)
+        workflow.add_conditional_edges(
+            "manager",
+            intent_classifier,
+            {"rag_agent": "rag_agent",
+             "chat_agent": "chat_agent",
+             **{name: name for name in api_agents},
+             "END": END}
+        )
+    else:
+        workflow.add_node("manager", router(manager_agent))
+        workflow.add_node("api_supervisor_agent", api_supervisor_agent)
+        workflow.add_edge("api_supervisor_agent", END)
+        workflow.add_conditional_edges(
+            "manager",
+            intent_classifier,
+            {"rag_agent": "rag_agent",
+             "chat_agent": "chat_agent",
+             "api_supervisor_agent": "api_supervisor_agent",
+             "END": END}
+        )
+
+    workflow.add_edge("rag_agent", END)
+    workflow.add_edge("chat_agent", END)
+
+    return workflow
+
+
+workflows = {(ROUTING_MODE, SUMMARY_MODE, SPECULATIVE_RETRIEVAL): build_workflow(ROUTING_MODE, SUMMARY_MODE, SPECULATIVE_RETRIEVAL)}
+workflow = workflows[(ROUTING_MODE, SUMMARY_MODE, SPECULATIVE_RETRIEVAL)]
 
 inmemory = MemorySaver()
 
+compiled_graphs = {}
+
+
+def get_compiled_graph(checkpointer=None, routing_mode: str = ROUTING_MODE, summary_mode: str = SUMMARY_MODE,
+                       speculative_retrieval: bool = SPECULATIVE_RETRIEVAL, **compile_kwargs):
+    """
+    Return the compiled workflow for a checkpointer and config, compiling it only once.
+
+    Args:
+        checkpointer: Checkpoint saver the graph persists thread state to (None for no memory).
+        routing_mode (str): Graph routing mode, see `build_workflow`.
+        summary_mode (str): Summarization mode, see `build_workflow`.
+        speculative_retrieval (bool): Prefetch RAG documents during routing, see `build_workflow`.
+        **compile_kwargs: Extra keyword arguments forwarded to `workflow.compile`.
+
+    Returns:
+        CompiledStateGraph: Shared compiled graph for this checkpointer/config pair.
+    """
+    options = (routing_mode, summary_mode, speculative_retrieval)
+    key = (checkpointer, *options, tuple(sorted((name, repr(value)) for name, value in compile_kwargs.items())))
+    graph = compiled_graphs.get(key)
+    if graph is None:
+        if options not in workflows:
+            workflows[options] = build_workflow(*options)
+        graph = workflows[options].compile(checkpointer=checkpointer, **compile_kwargs)
+        compiled_graphs[key] = graph
+    return graph
+
+
+def release_compiled_graphs(checkpointer=None):
+    """Drop cached graphs bound to `checkpointer`, or every cached graph if none is given."""
+    for key in list(compiled_graphs):
+        if checkpointer is None or key[0] is checkpointer:
+            del compiled_graphs[key]
+
+
 async def init_memory():
     conn = await aiosqlite.connect("db/chat_memory.db")
     return AsyncSqliteSaver(conn)
@@ -53,7 +141,7 @@ async def init_memory():
 
 # asqlmemory = asyncio.run(init_memory())
 
-ss_agent = workflow.compile()
+ss_agent = get_compiled_graph()
 
 if __name__ == "__main__":
     query = "How do i check my credit card application status?"
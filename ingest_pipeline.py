@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from langchain_core.documents import Document
+import itertools
+import asyncio
+import resource
+import time
+import os
+
+_DONE = None
+_splitter = None
+
+
+def _init_split_worker() -> None:
+    global _splitter
+    from rag_sources import get_text_splitter
+    _splitter = get_text_splitter()
+
+
+def _split_batch(docs: List[Document]) -> List[Document]:
+    from rag_sources import split_document
+    return [chunk for doc in docs for chunk in split_document(doc, _splitter)]
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its finished child processes, in MB (Linux units)."""
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+async def run_pipeline(
+    documents: Iterable[Document],
+    embeddings=None,
+    writer: Optional[Callable[[List[Document], List[List[float]]], Any]] = None,
+    *,
+    split: bool = True,
+    keep_chunk: Optional[Callable[[Document], bool]] = None,
+    split_workers: int = os.cpu_count() or 1,
+    split_batch_size: int = 64,
+    embed_batch_size: int = 64,
+    embed_concurrency: int = 2,
+    write_batch_size: int = 512,
+    queue_size: int = 8,
+) -> Dict[str, Any]:
+    """
+    Staged, bounded ingestion pipeline: load -> split -> embed -> write.
+
+    Documents are pulled lazily from `documents` in batches, split by tiktoken in a process pool,
+    embedded in `embed_batch_size` batches on worker threads and handed to `writer` in
+    `write_batch_size` bulk batches. Every stage is connected by a queue of at most `queue_size`
+    batches, so a slow stage throttles the ones before it and memory stays bounded regardless of
+    corpus size.
+
+    Args:
+        documents: Source documents (any iterable, e.g. a lazy loader).
+        embeddings: Embedding model; when None (or without `writer`) the pipeline stops after splitting.
+        writer: Called as `writer(chunks, vectors)` with one bulk batch.
+        split (bool): Split documents; False when `documents` are already chunks.
+        keep_chunk: Optional filter applied to each chunk before embedding.
+        split_workers (int): Processes in the splitting pool.
+        split_batch_size (int): Documents per split task.
+        embed_batch_size (int): Chunks per embedding call.
+        embed_concurrency (int): Embedding calls in flight.
+        write_batch_size (int): Chunks per writer call.
+        queue_size (int): Maximum batches buffered between two stages.
+
+    Returns:
+        dict: Document/chunk counts, elapsed seconds, chunks/sec and peak RSS.
+    """
+    loop = asyncio.get_running_loop()
+    split_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    chunk_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    embed_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    stats = {"documents": 0, "chunks": 0, "skipped_chunks": 0, "embedded": 0, "written": 0}
+    embed = embeddings is not None and writer is not None
+    start = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=split_workers, initializer=_init_split_worker) if split else None
+    iterator = iter(documents)
+
+    async def load():
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(iterator, split_batch_size)))
+            if not batch:
+                break
+            stats["documents"] += len(batch)
+            await split_queue.put(batch)
+        for _ in range(split_workers if split else 1):
+            await split_queue.put(_DONE)
+
+    async def split_worker():
+        while (batch := await split_queue.get()) is not _DONE:
+            chunks = await loop.run_in_executor(pool, _split_batch, batch) if split else batch
+            await chunk_queue.put(chunks)
+
+    async def split_stage():
+        await asyncio.gather(*(split_worker() for _ in range(split_workers if split else 1)))
+        await chunk_queue.put(_DONE)
+
+    async def rebatch():
+        pending: List[Document] = []
+        while (chunks := await chunk_queue.get()) is not _DONE:
+            for chunk in chunks:
+                if keep_chunk is not None and not keep_chunk(chunk):
+                    stats["skipped_chunks"] += 1
+                    continue
+                stats["chunks"] += 1
+                pending.append(chunk)
+                if len(pending) >= embed_batch_size:
+                    if embed:
+                        await embed_queue.put(pending)
+                    pending = []
+        if embed:
+            if pending:
+                await embed_queue.put(pending)
+            for _ in range(embed_concurrency):
+                await embed_queue.put(_DONE)
+
+    async def embed_worker():
+        while (chunks := await embed_queue.get()) is not _DONE:
+            vectors = await asyncio.to_thread(embeddings.embed_documents, [chunk.page_content for chunk in chunks])
+            stats["embedded"] += len(chunks)
+            await write_queue.put((chunks, vectors))
+
+    async def embed_stage():
+        await asyncio.gather(*(embed_worker() for _ in range(embed_concurrency)))
+        await write_queue.put(_DONE)
+
+    async def write():
+        chunks: List[Document] = []
+        vectors: List[List[float]] = []
+        while (item := await write_queue.get()) is not _DONE:
+            chunks.extend(item[0])
+            vectors.extend(item[1])
+            if len(chunks) >= write_batch_size:
+                await asyncio.to_thread(writer, chunks, vectors)
+                stats["written"] += len(chunks)
+                chunks, vectors = [], []
+        if chunks:
+            await asyncio.to_thread(writer, chunks, vectors)
+            stats["written"] += len(chunks)
+
+    stages = [load(), split_stage(), rebatch()]
+    if embed:
+        stages += [embed_stage(), write()]
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = elapsed
+    stats["chunks_per_second"] = stats["chunks"] / elapsed if elapsed else 0.0
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return stats
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    rss = stats["peak_rss_mb"]
+    return (f"{stats['documents']} documents -> {stats['chunks']} chunks "
+            f"({stats['skipped_chunks']} unchanged skipped), {stats['written']} written "
+            f"in {stats['elapsed_seconds']:.1f}s, {stats['chunks_per_second']:.1f} chunks/sec, "
+            f"peak RSS {rss['main']:.0f} MB (split workers {rss['children']:.0f} MB)")
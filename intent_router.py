@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv, find_dotenv
+import numpy as np
+import pandas as pd
+import asyncio
+import yaml
+import os
+
+load_dotenv(find_dotenv())
+
+examples_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_examples.yaml")
+
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "true").lower() == "true"
+ROUTER_MIN_SIMILARITY = float(os.getenv("ROUTER_MIN_SIMILARITY", "0.55"))
+ROUTER_MIN_MARGIN = float(os.getenv("ROUTER_MIN_MARGIN", "0.05"))
+
+
+def load_examples(router: str, path: str = examples_path) -> Dict[str, List[str]]:
+    """
+    Load the labeled example queries of one router.
+
+    Args:
+        router (str): Section name, e.g. "manager" or "api_supervisor".
+        path (str): A YAML file (`router -> label -> [queries]`) or a CSV with columns
+            `router,label,query`.
+
+    Returns:
+        dict: Label to example queries.
+    """
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+        df = df[df["router"] == router]
+        return {label: group["query"].tolist() for label, group in df.groupby("label")}
+
+    with open(path) as f:
+        return yaml.safe_load(f)[router]
+
+
+def load_leaf_examples(path: str = examples_path) -> Dict[str, List[str]]:
+    """
+    Examples for single-hop routing straight to leaf agents.
+
+    The manager's `api_supervisor_agent` label is replaced by the api_supervisor section's product
+    agent labels; the other manager labels are kept as they are.
+    """
+    manager = load_examples("manager", path)
+    leaf = {label: queries for label, queries in manager.items() if label != "api_supervisor_agent"}
+    leaf.update(load_examples("api_supervisor", path))
+    return leaf
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class CentroidRouter:
+    """
+    Nearest-centroid intent classifier over query embeddings.
+
+    Each label is represented by the normalized mean embedding of its example queries. A query is
+    routed in-process only when its best cosine similarity is at least `min_similarity` and beats
+    the runner-up by `min_margin`; otherwise `aroute` returns None so the caller can fall back to
+    the LLM router.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        examples: Dict[str, List[str]],
+        min_similarity: float = ROUTER_MIN_SIMILARITY,
+        min_margin: float = ROUTER_MIN_MARGIN,
+    ):
+        self.embeddings = embeddings
+        self.examples = examples
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.labels: List[str] = list(examples)
+        self.centroids: Optional[np.ndarray] = None
+        self._lock = asyncio.Lock()
+
+    async def atrain(self) -> None:
+        """Embed the example queries and compute one centroid per label (done once, lazily)."""
+        async with self._lock:
+            if self.centroids is not None:
+                return
+            centroids = []
+            for label in self.labels:
+                vectors = _normalize(np.asarray(await self.embeddings.aembed_documents(self.examples[label]), dtype=np.float32))
+                centroids.append(vectors.mean(axis=0))
+            self.centroids = _normalize(np.stack(centroids))
+
+    async def aclassify(self, query: str) -> Tuple[str, float, float]:
+        """
+        Score a query against every label.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            tuple: (best label, its cosine similarity, margin over the runner-up label).
+        """
+        await self.atrain()
+        vector = _normalize(np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32))
+        scores = self.centroids @ vector
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        margin = best - float(scores[order[1]]) if len(order) > 1 else best
+        return self.labels[order[0]], best, margin
+
+    async def aroute(self, query: str) -> Optional[str]:
+        """Return the label for a confidently classified query, or None to defer to the LLM."""
+        label, score, margin = await self.aclassify(query)
+        if score >= self.min_similarity and margin >= self.min_margin:
+            return label
+        return None
+
+
+def merge_examples(examples: Dict[str, List[str]], extra_examples: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+    """Add `extra_examples` to `examples`, skipping duplicates; labels not in `examples` are added."""
+    for label, queries in (extra_examples or {}).items():
+        examples[label] = examples.get(label, []) + [query for query in queries if query not in examples.get(label, [])]
+    return examples
+
+
+def build_router(router: str, extra_examples: Optional[Dict[str, List[str]]] = None) -> Optional[CentroidRouter]:
+    """
+    Create the fast router for a section of `router_examples.yaml`, or None when disabled.
+
+    `router="leaf"` builds the single-hop router over all leaf agents (see `load_leaf_examples`).
+    `extra_examples` (e.g. the API catalog's example queries) are merged in, adding labels the
+    YAML does not have yet.
+    """
+    if not FAST_ROUTER_ENABLED:
+        return None
+    from rag_retriever_chroma import embeddings
+    examples = load_leaf_examples() if router == "leaf" else load_examples(router)
+    return CentroidRouter(embeddings, merge_examples(examples, extra_examples))
@@ -0,0 +1,155 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+import json
+import math
+import os
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens, so product terms like "RBL", "Scoins" or "UPI PIN" match exactly."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def matches_filter(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style `where` filter of equality conditions, optionally combined with `$and`."""
+    if not where:
+        return True
+    conditions = where.get("$and", [where])
+    return all(metadata.get(field) == value for condition in conditions for field, value in condition.items())
+
+
+class KeywordIndex:
+    """
+    In-process BM25 index over the chunks of the vector store.
+
+    Chunks are added and deleted by their vector store ID, so the index is maintained alongside
+    the Chroma collection by `rag_index.py`. It is persisted as the per-chunk term frequencies
+    (plus text and metadata); loading rebuilds the inverted index from them without re-tokenizing.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _index(self, doc_id: str, entry: Dict[str, Any]) -> None:
+        self.docs[doc_id] = entry
+        for term, tf in entry["tf"].items():
+            self._postings[term][doc_id] = tf
+        self._total_length += entry["length"]
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """Add or replace chunks."""
+        for i, (doc_id, text) in enumerate(zip(ids, texts)):
+            self.delete([doc_id])
+            tokens = tokenize(text)
+            self._index(doc_id, {
+                "text": text,
+                "metadata": (metadatas[i] if metadatas else None) or {},
+                "tf": dict(Counter(tokens)),
+                "length": len(tokens),
+            })
+
+    def delete(self, ids: Iterable[str]) -> None:
+        for doc_id in ids:
+            entry = self.docs.pop(doc_id, None)
+            if entry is None:
+                continue
+            for term in entry["tf"]:
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= entry["length"]
+
+    def clear(self) -> None:
+        self.docs.clear()
+        self._postings.clear()
+        self._total_length = 0
+
+    def search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        BM25 search.
+
+        Args:
+            query (str): The user query.
+            k (int): Number of results.
+            filter (dict): Only return chunks whose metadata matches this `where` filter.
+
+        Returns:
+            list: `(Document, score)` pairs, best first. Documents carry their vector store ID.
+        """
+        if not self.docs:
+            return []
+        n = len(self.docs)
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if filter and not matches_filter(self.docs[doc_id]["metadata"], filter):
+                    continue
+                length = self.docs[doc_id]["length"]
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(Document(page_content=self.docs[doc_id]["text"], metadata=self.docs[doc_id]["metadata"], id=doc_id), score)
+                for doc_id, score in best]
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.docs}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "KeywordIndex":
+        """Load a saved index, or return an empty one if `path` does not exist."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, entry in data["docs"].items():
+            index._index(doc_id, entry)
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int = 4, rrf_k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Document]:
+    """
+    Fuse ranked result lists with reciprocal rank fusion: score = sum(weight / (rrf_k + rank)).
+
+    Documents are matched across lists by their ID, or by their content when they have none.
+
+    Args:
+        rankings: Result lists, each best first.
+        k (int): Number of fused results.
+        rrf_k (int): Rank smoothing constant; larger values flatten the contribution of top ranks.
+        weights: Per-list weights (default 1.0 each).
+
+    Returns:
+        list: The top `k` documents.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = defaultdict(float)
+    docs: Dict[Hashable, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, 1):
+            key = doc.id or doc.page_content
+            scores[key] += weight / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
@@ -0,0 +1,236 @@
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv, find_dotenv
+from backend_limits import limit_backend
+import threading
+import asyncio
+import random
+import time
+import json
+import os
+
+load_dotenv(find_dotenv())
+
+# Set to "stub" to serve every model from the offline stub backend (see stub_llm.py).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "")
+BEDROCK_PROFILE = os.getenv("BEDROCK_PROFILE", "default")
+BEDROCK_REGION = os.getenv("BEDROCK_REGION") or None
+# HTTP connections kept open by the shared bedrock-runtime client.
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+# Default per-model limits by backend. Requests per second 0 means no rate limit.
+DEFAULT_LIMITS = {
+    "bedrock": {"max_concurrency": int(os.getenv("LLM_BEDROCK_MAX_CONCURRENCY", "8")),
+                "requests_per_second": float(os.getenv("LLM_BEDROCK_RPS", "10"))},
+    "ollama": {"max_concurrency": int(os.getenv("LLM_OLLAMA_MAX_CONCURRENCY", "2")),
+               "requests_per_second": float(os.getenv("LLM_OLLAMA_RPS", "0"))},
+    "stub": {"max_concurrency": int(os.getenv("LLM_STUB_MAX_CONCURRENCY", "1000")),
+             "requests_per_second": float(os.getenv("LLM_STUB_RPS", "0"))},
+}
+# Per-model overrides, e.g. '{"meta.llama3-8b-instruct-v1:0": {"max_concurrency": 4, "requests_per_second": 5}}'.
+MODEL_LIMITS: Dict[str, Dict[str, float]] = json.loads(os.getenv("LLM_MODEL_LIMITS", "{}"))
+THROTTLE_RETRIES = int(os.getenv("LLM_THROTTLE_RETRIES", "3"))
+THROTTLE_BACKOFF_SECONDS = float(os.getenv("LLM_THROTTLE_BACKOFF_SECONDS", "0.5"))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}"
+    return any(marker in text for marker in ("ThrottlingException", "TooManyRequests", "Too many requests", "Rate exceeded"))
+
+
+class ModelLimiter:
+    """
+    Concurrency cap plus token bucket for one model.
+
+    Calls beyond `max_concurrency`, or faster than `requests_per_second` (with bursts of up to
+    `burst` calls), wait in line instead of failing. Calls the provider still throttles are
+    retried up to `retries` times with jittered exponential backoff.
+
+    `run` limits async calls and `run_sync` blocking ones. Both draw from the same rate bucket,
+    but each has its own concurrency cap, so mixing them can run up to twice `max_concurrency`
+    calls at once.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_second: float = 0, burst: Optional[int] = None,
+                 retries: int = THROTTLE_RETRIES, backoff_seconds: float = THROTTLE_BACKOFF_SECONDS):
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.requests_per_second = requests_per_second
+        self.burst = burst or self.max_concurrency
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self._loop = None
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        self._sync_semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.counters = {"calls": 0, "queued": 0, "wait_seconds": 0.0, "throttled": 0, "errors": 0}
+
+    def _bind(self) -> None:
+        # asyncio primitives belong to one event loop; recreate them if the model is used from another.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _reserve_token(self) -> float:
+        """Take a rate token, possibly ahead of time; returns how long to wait before the call may start."""
+        if self.requests_per_second <= 0:
+            return 0.0
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.requests_per_second)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.requests_per_second)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Backoff before retrying a throttled call; re-raises errors that are not retried."""
+        if not is_throttling_error(error) or attempt == self.retries:
+            self.counters["errors"] += 1
+            raise error
+        self.counters["throttled"] += 1
+        return self.backoff_seconds * 2 ** attempt * (0.5 + random.random())
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `call` once a concurrency slot and a rate token are available."""
+        self._bind()
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            if self._semaphore.locked():
+                self.counters["queued"] += 1
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            try:
+                await asyncio.sleep(self._reserve_token())
+                self.counters["wait_seconds"] += time.perf_counter() - start
+                self.counters["calls"] += 1
+                self.active += 1
+                try:
+                    return await call()
+                finally:
+                    self.active -= 1
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+            finally:
+                self._semaphore.release()
+            await asyncio.sleep(delay)
+
+    def run_sync(self, call: Callable[[], Any]) -> Any:
+        """Blocking counterpart of `run` for sync callers."""
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            if not self._sync_semaphore.acquire(blocking=False):
+                self.counters["queued"] += 1
+                self.waiting += 1
+                try:
+                    self._sync_semaphore.acquire()
+                finally:
+                    self.waiting -= 1
+            try:
+                time.sleep(self._reserve_token())
+                self.counters["wait_seconds"] += time.perf_counter() - start
+                self.counters["calls"] += 1
+                self.active += 1
+                try:
+                    return call()
+                finally:
+                    self.active -= 1
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+            finally:
+                self._sync_semaphore.release()
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_second": self.requests_per_second,
+            "active": self.active,
+            "waiting": self.waiting,
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()},
+        }
+
+
+@lru_cache(maxsize=None)
+def bedrock_client(profile: Optional[str] = BEDROCK_PROFILE, region: Optional[str] = BEDROCK_REGION):
+    """One bedrock-runtime client (and HTTP connection pool) shared by every Bedrock model."""
+    import boto3
+    from botocore.config import Config
+    session = boto3.Session(profile_name=profile, region_name=region)
+    return session.client("bedrock-runtime", config=Config(max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                                                          retries={"max_attempts": 2, "mode": "standard"}))
+
+
+def create_model(backend: str, model: str, **params):
+    """Instantiate the chat model for a backend; `params` are the model's sampling parameters."""
+    if backend == "bedrock":
+        from langchain_aws import ChatBedrock
+        return ChatBedrock(client=bedrock_client(), model_id=model, model_kwargs=params)
+    if backend == "ollama":
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=model, **params)
+    if backend == "stub":
+        from stub_llm import create_stub_model
+        return create_stub_model(model, **params)
+    raise ValueError(f"Unknown LLM backend: {backend}")
+
+
+class LLMRegistry:
+    """
+    Shared chat models for every agent.
+
+    `get(backend, model, **params)` returns one model per (backend, model, params), so agents using
+    the same model and settings share a client. Models of the same (backend, model) share one
+    `ModelLimiter` whatever their params, since the provider's limits apply per model; sync calls
+    (`invoke`) are limited too. The returned model also honours the per-run backend semaphores of
+    `backend_limits` (used by the batch runner), which only apply to async calls.
+
+    With `backend_override` (`LLM_BACKEND`), every model is created on that backend instead.
+    """
+
+    def __init__(self, factory: Callable[..., Any] = create_model, backend_override: str = LLM_BACKEND):
+        self.factory = factory
+        self.backend_override = backend_override
+        self._models: Dict[Tuple[str, str, Tuple], Any] = {}
+        self._limiters: Dict[Tuple[str, str], ModelLimiter] = {}
+
+    def limiter(self, backend: str, model: str) -> ModelLimiter:
+        key = (backend, model)
+        if key not in self._limiters:
+            limits = {**DEFAULT_LIMITS.get(backend, {"max_concurrency": 4, "requests_per_second": 0}), **MODEL_LIMITS.get(model, {})}
+            self._limiters[key] = ModelLimiter(**limits)
+        return self._limiters[key]
+
+    def get(self, backend: str, model: str, **params):
+        # Batch semaphores keep applying by the agent's nominal backend when it is overridden.
+        served_by = self.backend_override or backend
+        key = (served_by, model, tuple(sorted((name, repr(value)) for name, value in params.items())))
+        if key not in self._models:
+            llm = self.factory(served_by, model, **params)
+            self._models[key] = limit_backend(llm, backend, limiter=self.limiter(served_by, model))
+        return self._models[key]
+
+    def reset_stats(self) -> None:
+        """Zero the counters of every limiter; models, limits and in-flight calls are unaffected."""
+        for limiter in self._limiters.values():
+            limiter.counters = {key: 0.0 if isinstance(value, float) else 0 for key, value in limiter.counters.items()}
+
+    def stats(self) -> dict:
+        """Limiter counters per `backend/model`, and the number of distinct model clients."""
+        return {
+            "models": len(self._models),
+            "limits": {f"{backend}/{model}": limiter.stats() for (backend, model), limiter in self._limiters.items()},
+        }
+
+
+registry = LLMRegistry()
+
+
+def get_llm(backend: str, model: str, **params):
+    """Shared, rate-limited chat model from the global registry."""
+    return registry.get(backend, model, **params)
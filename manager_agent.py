@@ -6,18 +6,23 @@ from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from langgraph.types import Command
 from typing import Literal
 from GlobalState import GlobalState
+from llm_registry import get_llm
+from intent_router import build_router
+from api_catalog import catalog, agent_name, product_examples, routing_instructions
 import asyncio
 
 
-manager_llm = ChatBedrock(credentials_profile_name="default",
-                          model_id="meta.llama3-8b-instruct-v1:0",
-                          model_kwargs=dict(temperature=0))
+manager_llm = get_llm("bedrock", "meta.llama3-8b-instruct-v1:0", temperature=0)
 
+fast_router = build_router("manager", extra_examples=product_examples("api_supervisor_agent"))
+leaf_fast_router = build_router("leaf", extra_examples=product_examples())
+
+API_LEAF_TARGETS = {agent_name(product) for product in catalog}
+LEAF_TARGETS = {"rag_agent", "chat_agent", *API_LEAF_TARGETS}
 
-async def manager_agent(state: GlobalState) -> GlobalState:
-    query = state.get("query", "")
-    conversation_history = state.get("summary", "")
 
+async def llm_route(query: str, conversation_history: str = "") -> str:
+    """Route a query with the Bedrock manager prompt."""
     manager_prompt = PromptTemplate(
         template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
         You are a multi-agent AI assistant for the company SalarySe.
@@ -54,6 +59,23 @@ async def manager_agent(state: GlobalState) -> GlobalState:
     if response not in valid_responses:
         response = "END" 
 
+    return response
+
+
+async def manager_agent(state: GlobalState) -> GlobalState:
+    query = state.get("query", "")
+    conversation_history = state.get("summary", "")
+
+    response = None
+    if fast_router is not None:
+        try:
+            response = await fast_router.aroute(query)
+        except Exception as e:
+            print(f"Fast router failed, falling back to LLM: {str(e)}")
+
+    if response is None:
+        response = await llm_route(query, conversation_history)
+
     updated_state = {
         "intent": response
     }
@@ -62,6 +84,74 @@ async def manager_agent(state: GlobalState) -> GlobalState:
 
 
 
+async def llm_leaf_route(query: str, conversation_history: str = "") -> str:
+    """Route a query straight to a leaf agent with a single Bedrock prompt."""
+    leaf_prompt = PromptTemplate(
+        template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+        You are a multi-agent AI assistant for the company SalarySe.
+        Your job is to act as a manager agent that routes queries to worker agents based on their content.
+        Your task is to decide query routing based on its content.
+
+        If the user wants to check or interact with their own account or a SalarySe product through an API:
+        {routing_instructions}
+        - If the query is about the company SalarySe, its policies, products, services, or data (e.g., "Tell me about SalarySe policies", "What are SalarySe's product offerings?", "Tell me about the SalarySe savings account"), respond with "rag_agent".
+        - If the query is a general conversational query (e.g., "How are you?", "Tell me something", "What are the latest news?", or anything unrelated to SalarySe), respond with "chat_agent".
+        - If the query asks for context about previous queries (e.g., "What did I ask previously?", "Can you remind me of what I said earlier?", etc.), respond with "chat_agent".
+        - If the query cannot be determined to match any of the above categories, respond with "END".
+
+        **Respond only with a single word: {api_agent_names}, "rag_agent", "chat_agent", or "END".**
+        Do not provide any extra explanation or context.
+
+        You can access the previous conversation history through the 'summary' key in the state.
+
+        Query: {query}
+        summary: {summary}
+        Answer:
+        <|eot_id|><|start_header_id|>assistant<|end_header_id|>""",
+        input_variables=["query", "summary"],
+        partial_variables={"routing_instructions": routing_instructions(),
+                           "api_agent_names": ", ".join(f'"{name}"' for name in sorted(API_LEAF_TARGETS))},
+    )
+
+    leaf_chain = leaf_prompt | manager_llm | StrOutputParser()
+
+    try:
+        response = await leaf_chain.ainvoke({"query": query, "summary": conversation_history})
+    except Exception as e:
+        response = "END"
+
+    if response not in LEAF_TARGETS:
+        response = "END"
+
+    return response
+
+
+async def leaf_router_agent(state: GlobalState) -> GlobalState:
+    """
+    Single-hop manager: route directly to a leaf agent (RAG, chat or a product API agent).
+
+    Replaces the manager -> api_supervisor double routing when the graph is built with
+    `routing_mode="flat"`.
+    """
+    query = state.get("query", "")
+    conversation_history = state.get("summary", "")
+
+    response = None
+    if leaf_fast_router is not None:
+        try:
+            response = await leaf_fast_router.aroute(query)
+        except Exception as e:
+            print(f"Fast router failed, falling back to LLM: {str(e)}")
+
+    if response is None:
+        response = await llm_leaf_route(query, conversation_history)
+
+    updated_state = {"intent": response}
+    if response in API_LEAF_TARGETS:
+        updated_state["api_intent"] = response
+
+    return updated_state
+
 
 def intent_classifier(state: GlobalState) -> str:
     intent = state.get("intent", "")
@@ -4,6 +4,12 @@ from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 import os
 import logging
+import argparse
+import asyncio
+import json
+import time
+import hashlib
+import sqlite3
 
 logging.basicConfig(level=logging.INFO, filename="metadatalog.log", filemode="w", format="%(levelname)s: %(message)s")
 
@@ -62,16 +68,211 @@ prompt_template = PromptTemplate(
 )
 
 
+metadata_chain = prompt_template | model | JsonOutputParser()
+
+# Identifies the prompt and model that produced a cached result; changing either misses the cache.
+TAGGER_VERSION = hashlib.sha256(f"{prompt_template.template}|{model.model}|{model.temperature}".encode()).hexdigest()[:16]
+TAG_CACHE_PATH = os.getenv("METADATA_TAG_CACHE", os.path.join(os.getcwd(), "db", "metadata_tag_cache.sqlite"))
+
+
+def row_data(df: pd.DataFrame, index) -> dict:
+    """The fields of a row that are tagged: every column except a previous run's `metadata`."""
+    return df.loc[index].drop(labels="metadata", errors="ignore").to_dict()
+
+
+def format_row(rowdata: dict) -> str:
+    return "\n".join([f"{key}: {str(rowdata[key])}" for key in rowdata.keys()])
+
+
+def row_key(rowdata: dict, version: str = TAGGER_VERSION) -> str:
+    """Content hash of a row: whitespace-normalized values of every column except `metadata`, plus the tagger version."""
+    normalized = "\n".join(f"{key}: {' '.join(str(value).split())}" for key, value in rowdata.items() if key != "metadata")
+    return hashlib.sha256(f"{version}\n{normalized}".encode()).hexdigest()
+
+
+class TagCache:
+    """
+    Persistent cache of metadata tagging results in SQLite, keyed by `row_key`.
+
+    Rows whose text is unchanged are served from the cache on re-runs; a new prompt or model changes
+    the version part of every key, so stale results are never returned. Failed taggings are not stored.
+    """
+
+    def __init__(self, path: str = TAG_CACHE_PATH, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tags (key TEXT PRIMARY KEY, version TEXT, metadata TEXT)")
+        return self._conn
+
+    def get(self, rowdata: dict):
+        if not self.enabled:
+            return None
+        row = self.conn.execute("SELECT metadata FROM tags WHERE key = ?", (row_key(rowdata),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, rowdata: dict, metadata: dict) -> None:
+        if self.enabled:
+            self.conn.execute("INSERT OR REPLACE INTO tags VALUES (?, ?, ?)", (row_key(rowdata), TAGGER_VERSION, json.dumps(metadata)))
+            self.conn.commit()
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"tag cache: {self.hits}/{lookups} hits ({rate:.1%}), version {TAGGER_VERSION}"
+
+
+tag_cache = TagCache()
+
+
 def get_metadata_tags(rowdata: dict) -> dict:
-    metadata_chain = prompt_template | model | JsonOutputParser()
-    row_data_str = "\n".join([f"{key}: {str(rowdata[key])}" for key in rowdata.keys()])
+    cached = tag_cache.get(rowdata)
+    if cached is not None:
+        return cached
+
+    row_data_str = format_row(rowdata)
 
     try:
         response = metadata_chain.invoke({"text": row_data_str})
-        return response.get("metadata", {"metadata": None})
     except Exception as e:
         logging.error(f"Error processing row: {e}")
         return {"metadata": None}
+    if "metadata" not in response:
+        return {"metadata": None}
+    tag_cache.put(rowdata, response["metadata"])
+    return response["metadata"]
+
+
+async def aget_metadata_tags(rowdata: dict) -> dict:
+    """Async variant of `get_metadata_tags`; raises on failure so callers can count and retry it."""
+    cached = tag_cache.get(rowdata)
+    if cached is not None:
+        return cached
+
+    response = await metadata_chain.ainvoke({"text": format_row(rowdata)})
+    if "metadata" not in response:
+        return {"metadata": None}
+    tag_cache.put(rowdata, response["metadata"])
+    return response["metadata"]
+
+
+def progress_path(tsv_file: str) -> str:
+    """Sidecar file recording the rows of `tsv_file` that are already tagged."""
+    return tsv_file + ".progress.jsonl"
+
+
+def load_progress(tsv_file: str) -> dict:
+    """Row index -> (`row_key`, metadata) for rows completed by previous (interrupted) runs."""
+    done = {}
+    path = progress_path(tsv_file)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[entry["index"]] = (entry.get("key"), entry["metadata"])
+    return done
+
+
+async def tag_file_async(tsv_file: str, concurrency: int = 4, checkpoint_every: int = 20) -> dict:
+    """
+    Tag one TSV with at most `concurrency` concurrent Ollama calls, resuming from its sidecar.
+
+    Completed rows are appended to the sidecar every `checkpoint_every` rows, so an interrupted
+    run only redoes the rows tagged since the last checkpoint. Entries are matched by row index and
+    `row_key`, so rows edited or moved since the interrupted run are tagged again. Failed rows are
+    not recorded and are retried by the next run; the sidecar is removed once every row succeeded.
+
+    Returns:
+        dict: Row counts (`rows`, `resumed`, `tagged`, `failed`) and `seconds`.
+    """
+    df = pd.read_csv(tsv_file, sep="\t")
+    progress = load_progress(tsv_file)
+    keys = {int(index): row_key(row_data(df, index)) for index in df.index}
+    done = {index: metadata for index, (key, metadata) in progress.items() if keys.get(index) == key}
+    pending = [index for index in df.index if int(index) not in done]
+    semaphore = asyncio.Semaphore(concurrency)
+    buffer = []
+    stats = {"rows": len(df), "resumed": len(df) - len(pending), "tagged": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def flush():
+        if buffer:
+            with open(progress_path(tsv_file), "a") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in buffer)
+            buffer.clear()
+
+    async def tag(index):
+        rowdata = row_data(df, index)
+        async with semaphore:
+            try:
+                metadata = await aget_metadata_tags(rowdata)
+            except Exception as e:
+                logging.error(f"Error processing row {index} of {tsv_file}: {e}")
+                stats["failed"] += 1
+                return
+        done[int(index)] = metadata
+        stats["tagged"] += 1
+        buffer.append({"index": int(index), "key": keys[int(index)], "metadata": metadata})
+        if len(buffer) >= checkpoint_every:
+            flush()
+
+    try:
+        await asyncio.gather(*(tag(index) for index in pending))
+    finally:
+        flush()
+
+    df["metadata"] = [str(done.get(int(index), {"metadata": None})) for index in df.index]
+    output_file = tsv_file.replace(".tsv", "_with_metadata.csv")
+    df.to_csv(output_file, index=False)
+    if stats["failed"] == 0 and os.path.exists(progress_path(tsv_file)):
+        os.remove(progress_path(tsv_file))
+
+    stats["seconds"] = time.perf_counter() - start
+    logging.info(f"Successfully processed {tsv_file}, saved to {output_file}")
+    return stats
+
+
+def report(name: str, stats: dict) -> str:
+    minutes = stats["seconds"] / 60
+    rate = stats["tagged"] / minutes if minutes else 0.0
+    return (f"{name}: {stats['rows']} rows, {stats['resumed']} resumed, {stats['tagged']} tagged, "
+            f"{stats['failed']} failed in {stats['seconds']:.1f}s ({rate:.1f} rows/min)")
+
+
+async def main_async(data_dir: str, concurrency: int, checkpoint_every: int):
+    tsv_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith(".tsv")]
+    total = {"rows": 0, "resumed": 0, "tagged": 0, "failed": 0, "seconds": 0.0}
+
+    for tsv_file in tsv_files:
+        try:
+            stats = await tag_file_async(tsv_file, concurrency, checkpoint_every)
+        except Exception as e:
+            logging.error(f"Error reading file {tsv_file}: {e}")
+            continue
+        message = report(os.path.basename(tsv_file), stats)
+        logging.info(message)
+        print(message)
+        for key in total:
+            total[key] += stats[key]
+
+    for message in (report("total", total), tag_cache.report()):
+        logging.info(message)
+        print(message)
 
 
 def main():
@@ -87,7 +288,7 @@ def main():
             continue
 
         for index in df.index:
-            rowdata = df.loc[index].to_dict()
+            rowdata = row_data(df, index)
             metadata = get_metadata_tags(rowdata)
             df.at[index, "metadata"] = str(metadata)
 
@@ -96,6 +297,20 @@ def main():
 
         logging.info(f"Successfully processed {tsv_file}, saved to {output_file}")
 
+    logging.info(tag_cache.report())
+    print(tag_cache.report())
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Tag the TSV files in data_int/ with metadata using the Ollama model.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Concurrent, resumable tagging.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent Ollama requests in async mode.")
+    parser.add_argument("--checkpoint-every", type=int, default=20, help="Rows between progress checkpoints in async mode.")
+    parser.add_argument("--no-cache", action="store_true", help="Re-tag every row instead of reusing cached results.")
+    args = parser.parse_args()
+    tag_cache.enabled = not args.no_cache
+
+    if args.use_async:
+        asyncio.run(main_async(os.path.join(os.getcwd(), "data_int"), args.concurrency, args.checkpoint_every))
+    else:
+        main()
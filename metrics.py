@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+DOCUMENT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], **extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in [*zip(names, values), *extra.items()]]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            # Per-bucket counts, then sum and count.
+            series = self._series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le=f'{bound:g}')} {cumulative:g}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le='+Inf')} {series[-1]:g}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labels, labels)} {series[-1]:g}")
+        return lines
+
+
+NODE_SECONDS = Histogram("graph_node_duration_seconds", "Wall time of graph nodes.", ("node", "backend"))
+NODE_ERRORS = Counter("graph_node_errors_total", "Graph node runs that raised.", ("node",))
+RUN_SECONDS = Histogram("graph_run_duration_seconds", "Wall time of whole graph runs.", ("status",))
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Wall time of LLM calls.", ("node", "backend"))
+PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Prompt tokens per LLM call.", ("node", "backend"), TOKEN_BUCKETS)
+COMPLETION_TOKENS = Histogram("llm_completion_tokens", "Completion tokens per LLM call.", ("node", "backend"), TOKEN_BUCKETS)
+RETRIEVED_DOCUMENTS = Histogram("rag_documents", "Documents returned by the RAG retrieve and rerank nodes.", ("node",), DOCUMENT_BUCKETS)
+CACHE_LOOKUPS = Counter("rag_cache_lookups_total", "RAG semantic cache lookups.", ("result",))
+
+ALL_METRICS = (NODE_SECONDS, NODE_ERRORS, RUN_SECONDS, LLM_SECONDS, PROMPT_TOKENS, COMPLETION_TOKENS,
+               RETRIEVED_DOCUMENTS, CACHE_LOOKUPS)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(line for metric in ALL_METRICS for line in metric.render()) + "\n"
+
+
+def backend_name(metadata: Dict[str, Any]) -> str:
+    provider = str(metadata.get("ls_provider", "")).lower()
+    for backend in ("bedrock", "ollama", "groq", "stub"):
+        if backend in provider:
+            return backend
+    return provider or "unknown"
+
+
+class GraphMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler that records node, LLM and retrieval metrics of LangGraph runs.
+
+    A graph run is a root chain run outside any node; a graph node is a chain run whose name
+    equals its `langgraph_node` metadata, except LangGraph's own `__start__`-style nodes. The
+    node's `backend` label is the backend of the LLM calls made directly in it (`none` for nodes
+    without one, including agent nodes whose LLM calls belong to their subgraph's nodes). Tokens
+    come from the `usage_metadata` the chat models report. Pass the handler in the run config's
+    `callbacks`.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[UUID, Tuple[float, str, Optional[str]]] = {}
+        self._node_backends: Dict[str, str] = {}
+        self._roots: Dict[UUID, float] = {}
+
+    @staticmethod
+    def _task_key(metadata: Dict[str, Any], node: str) -> str:
+        return f"{metadata.get('langgraph_checkpoint_ns', '')}|{node}"
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if parent_run_id is None and not node:
+            self._roots[run_id] = time.perf_counter()
+        if node and kwargs.get("name") == node and not node.startswith("__"):
+            self._starts[run_id] = (time.perf_counter(), node, self._task_key(metadata, node))
+
+    def _end_node(self, run_id: UUID, outputs: Any = None, error: bool = False) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            start, node, key = started
+            NODE_SECONDS.observe(time.perf_counter() - start, node, self._node_backends.pop(key, "none"))
+            if error:
+                NODE_ERRORS.inc(node)
+            elif isinstance(outputs, dict):
+                if node in ("retrieve", "rerank") and isinstance(outputs.get("documents"), list):
+                    RETRIEVED_DOCUMENTS.observe(len(outputs["documents"]), node)
+                if node == "cache_lookup" and "cache_hit" in outputs:
+                    CACHE_LOOKUPS.inc("hit" if outputs["cache_hit"] else "miss")
+
+        root_start = self._roots.pop(run_id, None)
+        if root_start is not None:
+            RUN_SECONDS.observe(time.perf_counter() - root_start, "error" if error else "ok")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, outputs)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, error=True)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node", "none")
+        backend = backend_name(metadata)
+        self._node_backends[self._task_key(metadata, node)] = backend
+        self._starts[run_id] = (time.perf_counter(), node, backend)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        start, node, backend = started
+        LLM_SECONDS.observe(time.perf_counter() - start, node, backend)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    PROMPT_TOKENS.observe(usage.get("input_tokens", 0), node, backend)
+                    COMPLETION_TOKENS.observe(usage.get("output_tokens", 0), node, backend)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts.pop(run_id, None)
+
+
+metrics_handler = GraphMetricsHandler()
@@ -5,15 +5,21 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from dotenv import load_dotenv, find_dotenv
 import os
-from typing import TypedDict, List
+from typing import TypedDict, List, Optional
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_community.tools import TavilySearchResults
 from langchain.schema import Document
 from langgraph.graph import END, StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
 from GlobalState import GlobalState
-from rag_retriever_chroma import retriever_chroma
+from llm_registry import get_llm
+from rag_retriever_chroma import db, ahybrid_search, topic_predictor, embeddings, index_version
+from semantic_cache import SemanticCache
+from context_builder import build_context, count_tokens
+from reranker import build_reranker, select_top, RERANK_FETCH_K
+from speculative_retrieval import prefetcher
 import asyncio
+import time
 
 load_dotenv(find_dotenv())
 
@@ -25,44 +31,160 @@ load_dotenv(find_dotenv())
 #                   model_id="meta.llama3-8b-instruct-v1:0",
 #                   model_kwargs=dict(temperature=0))
 
-llm = ChatOllama(model="llama3:8b", temperature=0.0)
-async def retrieve(state: GlobalState) -> GlobalState:
-    
+llm = get_llm("ollama", "llama3:8b", temperature=0.0)
+
+# "hybrid" fuses vector and BM25 keyword results; "vector" uses the plain Chroma retriever.
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+RETRIEVAL_FETCH_K = int(os.getenv("RAG_FETCH_K", "20"))
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+KEYWORD_WEIGHT = float(os.getenv("RAG_KEYWORD_WEIGHT", "1.0"))
+
+# Restrict the search to the predicted topic/product/document type; retry unfiltered below FILTER_MIN_RESULTS hits.
+METADATA_FILTER_ENABLED = os.getenv("RAG_METADATA_FILTER", "true").lower() == "true"
+FILTER_MIN_RESULTS = int(os.getenv("RAG_FILTER_MIN_RESULTS", str(RETRIEVAL_TOP_K)))
+
+# Optional cross-encoder between retrieve and generate (RAG_RERANK_ENABLED); retrieval then over-fetches candidates.
+reranker = build_reranker()
+CANDIDATES_K = max(RERANK_FETCH_K, RETRIEVAL_TOP_K) if reranker is not None else RETRIEVAL_TOP_K
+
+answer_cache = SemanticCache(
+    embeddings,
+    similarity_threshold=float(os.getenv("RAG_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "3600")),
+    max_bytes=int(float(os.getenv("RAG_CACHE_MAX_MB", "32")) * 1024 * 1024),
+    index_version=index_version,
+) if os.getenv("RAG_CACHE_ENABLED", "true").lower() == "true" else None
+
+
+async def cache_lookup(state: GlobalState) -> GlobalState:
     """
-    Retrieve documents from the Chroma vectorstore.
+    Answer from the semantic cache when a near-identical query was already answered.
 
     Args:
         state (GlobalState): Current state containing the user query.
 
     Returns:
-        GlobalState: Updated state with retrieved documents.
+        GlobalState: `cache_hit` flag, plus the cached generation on a hit.
+    """
+    if answer_cache is None:
+        return {"cache_hit": False}
+
+    try:
+        cached = await answer_cache.alookup(state["query"])
+    except Exception as e:
+        print(f"Semantic cache lookup failed: {str(e)}")
+        cached = None
+
+    if cached is None:
+        return {"cache_hit": False}
+    # The speculative retrieval started during routing is not needed after all.
+    prefetcher.cancel(state.get("prefetch_id"))
+    return {"cache_hit": True, "generation": cached, "messages": [AIMessage(content=cached)], "prefetch_id": ""}
+
+
+def cache_router(state: GlobalState) -> str:
+    return END if state.get("cache_hit") else "retrieve"
+
+async def search(question: str, vector: List[float], where: Optional[dict] = None) -> List[Document]:
+    """Run the configured retrieval (hybrid or vector-only) for an already embedded query."""
+    if RETRIEVAL_MODE == "hybrid":
+        return await ahybrid_search(question, k=CANDIDATES_K, fetch_k=max(RETRIEVAL_FETCH_K, CANDIDATES_K), rrf_k=RRF_K,
+                                    keyword_weight=KEYWORD_WEIGHT, filter=where, embedding=vector)
+    return await db.asimilarity_search_by_vector(vector, k=CANDIDATES_K, filter=where)
+
+
+async def retrieve_documents(question: str) -> List[Document]:
     """
-    question = state["query"]
-    rag_docs = await retriever_chroma.ainvoke(question)
+    Retrieve documents for a query from the Chroma vectorstore, fused with BM25 keyword search in hybrid mode.
 
+    When metadata filtering is enabled, the search is restricted to the topic/product/document type
+    predicted for the query, and repeated without the filter if it returns fewer than
+    `FILTER_MIN_RESULTS` documents. Side-effect free, so it can run speculatively during routing.
+    """
+    vector = await embeddings.aembed_query(question)
+
+    where = None
+    if METADATA_FILTER_ENABLED:
+        try:
+            where = await topic_predictor.apredict(vector)
+        except Exception as e:
+            print(f"Metadata filter prediction failed: {str(e)}")
+
+    rag_docs = await search(question, vector, where)
+    if where is not None and len(rag_docs) < FILTER_MIN_RESULTS:
+        print(f"Only {len(rag_docs)} documents match {where}; searching without the metadata filter.")
+        rag_docs = await search(question, vector)
+    return rag_docs
+
+
+async def retrieve(state: GlobalState) -> GlobalState:
     
-    retrieved_docs = [doc.page_content for doc in rag_docs]
+    """
+    Retrieve documents for the user query, reusing the speculative retrieval started during routing if any.
+
+    Args:
+        state (GlobalState): Current state containing the user query and, with speculative
+            retrieval, the `prefetch_id` set by the router.
+
+    Returns:
+        GlobalState: Updated state with retrieved documents.
+    """
+    rag_docs = await prefetcher.aclaim(state.get("prefetch_id"))
+    if rag_docs is None:
+        rag_docs = await retrieve_documents(state["query"])
 
     updated_state = state.copy()
-    updated_state["documents"] = retrieved_docs
+    updated_state["documents"] = rag_docs
+    updated_state["prefetch_id"] = ""
     return updated_state 
 
 
+async def rerank(state: GlobalState) -> GlobalState:
+    """
+    Rerank the retrieved candidates with the local cross-encoder and keep the adaptive top-k.
+
+    Args:
+        state (GlobalState): Current state containing the user query and retrieved documents.
+
+    Returns:
+        GlobalState: Updated state with only the documents above the rerank score cutoff.
+    """
+    documents = state["documents"]
+    start = time.perf_counter()
+    try:
+        scores = await reranker.ascore(state["query"], documents)
+        kept = [doc for doc, _ in select_top(documents, scores)]
+    except Exception as e:
+        print(f"Rerank failed, keeping the retrieval order: {str(e)}")
+        kept = documents[:RETRIEVAL_TOP_K]
+    print(f"Rerank: {len(documents)} candidates -> {len(kept)} kept in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    updated_state = state.copy()
+    updated_state["documents"] = kept
+    return updated_state
+
+
 async def generate(state: GlobalState) -> GlobalState:
     """
     Generate an answer using RAG (Retrieve and Generate) on retrieved documents.
 
+    The context is assembled by `context_builder.build_context` (deduplicated, overlapping chunks
+    merged, capped at `RAG_CONTEXT_MAX_TOKENS`); the prompt's token count is logged and returned.
+    If the context cannot be built or counted, the documents are joined as they are and
+    `prompt_tokens` is None.
+
     Args:
         state (GlobalState): Current state containing the user query and retrieved documents.
 
     Returns:
-        GlobalState: Updated state with a new key `generation` containing the generated response.
+        GlobalState: Updated state with a new key `generation` containing the generated response,
+            and `prompt_tokens`.
     """
     query = state["query"]
     documents = state["documents"]
     
-    context = "\n\n".join(documents) if documents else "No relevant context available."
-
     prompt = PromptTemplate(
         template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
         You are an AI assistant representing SalarySe, specializing in answering questions about our company, products, and services from our perspective. 
@@ -80,25 +202,46 @@ async def generate(state: GlobalState) -> GlobalState:
 
     rag_chain = prompt | llm | StrOutputParser()
 
+    try:
+        context, context_stats = build_context(documents) if documents else ("", {})
+        context = context or "No relevant context available."
+        prompt_tokens = count_tokens(prompt.format(context=context, query=query))
+        print(f"RAG prompt: {prompt_tokens} tokens, context {context_stats}")
+    except Exception as e:
+        print(f"Error building RAG context, using the raw documents: {str(e)}")
+        context = "\n\n".join(getattr(doc, "page_content", str(doc)) for doc in documents) or "No relevant context available."
+        prompt_tokens = None
+
     try:
         generation = await rag_chain.ainvoke({"context": context, "query": query})
+        if answer_cache is not None:
+            await answer_cache.astore(query, generation.strip())
     except Exception as e:
         generation = f"I'm sorry, an error occurred while generating the response: {str(e)}"
 
     updated_state = state.copy()
     updated_state["generation"] = generation.strip()
     updated_state["messages"] = [AIMessage(content=generation.strip())]
+    updated_state["prompt_tokens"] = prompt_tokens
     return updated_state
 
 
 
 workflow = StateGraph(GlobalState)
 
+workflow.add_node("cache_lookup", cache_lookup)
 workflow.add_node("retrieve", retrieve)
 workflow.add_node("generate", generate)
+if reranker is not None:
+    workflow.add_node("rerank", rerank)
 
-workflow.set_entry_point("retrieve")
-workflow.add_edge("retrieve", "generate")
+workflow.set_entry_point("cache_lookup")
+workflow.add_conditional_edges("cache_lookup", cache_router, {"retrieve": "retrieve", END: END})
+if reranker is not None:
+    workflow.add_edge("retrieve", "rerank")
+    workflow.add_edge("rerank", "generate")
+else:
+    workflow.add_edge("retrieve", "generate")
 
 workflow.add_edge("generate", END)
 
@@ -111,7 +254,7 @@ if __name__ == "__main__":
     final_state = asyncio.run(rag_agent.ainvoke(initial_state, config=config))
     print("retrived docs: \n")
     for doc in final_state.get("documents", "No response generated."):
-        print("\n",doc)
+        print("\n",doc.page_content)
     print("-------------------------------------------\n")
     print("Final response: \n")
     
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from rag_sources import load_web_documents, iter_csv_documents, source_key, content_hash, chunk_id
+from ingest_pipeline import run_pipeline, format_stats
+from keyword_index import KeywordIndex
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read the ingestion manifest.
+
+    The manifest maps each source key to the content hash it was indexed with and the IDs of its
+    chunks in the vector store: `{"version": int, "sources": {key: {"hash": str, "chunks": [id, ...]}}}`.
+    """
+    if not os.path.exists(path):
+        return {"version": 0, "sources": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Any], path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def backfill_keyword_index(db, keyword_index: KeywordIndex, batch_size: int = 5000) -> int:
+    """Fill an empty keyword index from the chunks already stored in Chroma (no re-embedding)."""
+    total = db._collection.count()
+    for offset in range(0, total, batch_size):
+        batch = db._collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        keyword_index.add(batch["ids"], batch["documents"], batch["metadatas"])
+    return total
+
+
+def update_index(db, docs: Iterable[Document], manifest_path: str, full: bool = False, dry_run: bool = False,
+                 keep: Callable[[str], bool] = lambda key: False, keyword_index: Optional[KeywordIndex] = None,
+                 keyword_index_path: Optional[str] = None, **pipeline_options) -> Dict[str, Any]:
+    """
+    Bring the vector store in line with `docs`, embedding only new or changed chunks.
+
+    Sources whose content hash matches the manifest are skipped without splitting. Changed and new
+    sources go through the ingestion pipeline; their chunks whose IDs are already indexed are
+    filtered out before embedding, and only get their metadata (e.g. re-tagged topics or a new
+    `row_index`) updated in place. Chunks of changed or removed sources that no longer exist are
+    deleted afterwards.
+
+    Args:
+        db: Chroma vector store.
+        docs: Current source documents.
+        manifest_path (str): Manifest file of this vector store.
+        full (bool): Drop the existing collection and rebuild from scratch.
+        dry_run (bool): Only report what would change.
+        keep: Predicate on source keys missing from `docs` that should stay indexed rather than
+            be deleted (e.g. web pages when they were not fetched).
+        keyword_index (KeywordIndex): BM25 index kept in step with the vector store, if any.
+        keyword_index_path (str): File the keyword index is saved to.
+        **pipeline_options: Passed to `ingest_pipeline.run_pipeline` (batch sizes, workers, ...).
+
+    Returns:
+        dict: Pipeline stats plus counts of sources, unchanged sources, added, metadata-updated and
+            deleted chunks.
+    """
+    manifest = load_manifest(manifest_path)
+    if not manifest["sources"] and db._collection.count() > 0 and not dry_run:
+        print("Existing index has no manifest; rebuilding it from scratch.")
+        full = True
+    if full:
+        manifest = {"version": manifest.get("version", 0), "sources": {}}
+        if not dry_run:
+            db.reset_collection()
+            if keyword_index is not None:
+                keyword_index.clear()
+    elif keyword_index is not None and not len(keyword_index) and db._collection.count() > 0 and not dry_run:
+        print(f"Keyword index is empty; backfilled {backfill_keyword_index(db, keyword_index)} chunks from Chroma.")
+        if keyword_index_path:
+            keyword_index.save(keyword_index_path)
+
+    old_sources = manifest["sources"]
+    new_sources: Dict[str, Any] = {}
+    unchanged = 0
+    # Already embedded chunks of changed sources, whose stored metadata is refreshed without re-embedding.
+    refreshed: Dict[str, Document] = {}
+
+    def changed_docs():
+        nonlocal unchanged
+        for doc in docs:
+            key = source_key(doc)
+            digest = content_hash(doc)
+            old = old_sources.get(key)
+            if old and old["hash"] == digest:
+                new_sources[key] = old
+                unchanged += 1
+                continue
+            new_sources[key] = {"hash": digest, "chunks": []}
+            yield doc
+
+    def keep_chunk(chunk: Document) -> bool:
+        key = source_key(chunk)
+        cid = chunk_id(key, chunk)
+        entry = new_sources[key]
+        if cid in entry["chunks"]:
+            return False
+        entry["chunks"].append(cid)
+        old = old_sources.get(key)
+        if old and cid in old["chunks"]:
+            refreshed[cid] = chunk
+            return False
+        return True
+
+    def write(chunks: List[Document], vectors: List[List[float]]) -> None:
+        ids = [chunk_id(source_key(chunk), chunk) for chunk in chunks]
+        db._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[chunk.page_content for chunk in chunks],
+            metadatas=[chunk.metadata or None for chunk in chunks],
+        )
+        if keyword_index is not None:
+            keyword_index.add(ids, [chunk.page_content for chunk in chunks], [chunk.metadata for chunk in chunks])
+
+    stats = asyncio.run(run_pipeline(
+        changed_docs(),
+        None if dry_run else db.embeddings,
+        None if dry_run else write,
+        keep_chunk=keep_chunk,
+        **pipeline_options,
+    ))
+
+    to_delete = []
+    for key, old in old_sources.items():
+        if key in new_sources:
+            if new_sources[key] is not old:
+                to_delete.extend(set(old["chunks"]) - set(new_sources[key]["chunks"]))
+        elif keep(key):
+            new_sources[key] = old
+            unchanged += 1
+        else:
+            to_delete.extend(old["chunks"])
+
+    stats.update({"sources": len(new_sources), "unchanged_sources": unchanged, "added": stats["chunks"],
+                  "updated": len(refreshed), "deleted": len(to_delete)})
+    if dry_run:
+        return stats
+
+    batch_size = pipeline_options.get("write_batch_size", 512)
+    ids = list(refreshed)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        db._collection.update(ids=batch, metadatas=[refreshed[cid].metadata or None for cid in batch])
+    if keyword_index is not None and ids:
+        keyword_index.add(ids, [refreshed[cid].page_content for cid in ids], [refreshed[cid].metadata for cid in ids])
+    for start in range(0, len(to_delete), batch_size):
+        db.delete(ids=to_delete[start:start + batch_size])
+    if keyword_index is not None:
+        keyword_index.delete(to_delete)
+
+    if stats["added"] or stats["updated"] or to_delete or full or not os.path.exists(manifest_path):
+        save_manifest({"version": manifest.get("version", 0) + 1, "sources": new_sources}, manifest_path)
+        if keyword_index is not None and keyword_index_path:
+            keyword_index.save(keyword_index_path)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally (re)build the Chroma RAG index and its BM25 keyword index from the web pages and metadata/*.csv.")
+    parser.add_argument("--full", action="store_true", help="Rebuild the whole index.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    parser.add_argument("--skip-web", action="store_true", help="Do not fetch the web pages (keeps their indexed chunks).")
+    parser.add_argument("--split-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--embed-concurrency", type=int, default=2)
+    parser.add_argument("--write-batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    from rag_retriever_chroma import db, data_dir, manifest_path, keyword_index, keyword_index_path
+
+    start = time.perf_counter()
+    docs = iter_csv_documents(data_dir)
+    if not args.skip_web:
+        docs = itertools.chain(load_web_documents(), docs)
+    stats = update_index(db, docs, manifest_path, full=args.full, dry_run=args.dry_run,
+                         keep=lambda key: args.skip_web and "#" not in key,
+                         keyword_index=keyword_index, keyword_index_path=keyword_index_path,
+                         split_workers=args.split_workers, embed_batch_size=args.embed_batch_size,
+                         embed_concurrency=args.embed_concurrency, write_batch_size=args.write_batch_size)
+
+    print(f"{'Planned' if args.dry_run else 'Indexed'} {stats['sources']} sources "
+          f"({stats['unchanged_sources']} unchanged): +{stats['added']} / ~{stats['updated']} / -{stats['deleted']} chunks "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,95 @@
-from langchain_community.document_loaders import WebBaseLoader, CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_nomic.embeddings import NomicEmbeddings
 from langchain_core.documents import Document
+from keyword_index import KeywordIndex, reciprocal_rank_fusion
+from topic_filter import TopicPredictor
+from typing import Any, Dict, List, Optional
+from llm_registry import LLM_BACKEND
+import asyncio
 import os
-import pandas as pd
-import ast
 
 db_dir = os.path.join(os.getcwd(), "db")
 persistent_directory = os.path.join(db_dir, "vectorDB_for_RAG_chroma3")
 data_dir = os.path.join(os.getcwd(), "metadata")
+manifest_path = os.path.join(db_dir, "vectorDB_for_RAG_chroma3_manifest.json")
+keyword_index_path = os.path.join(db_dir, "vectorDB_for_RAG_chroma3_bm25.json")
 
-urls = [
-    "https://www.salaryse.com/",
-    "https://salaryse.com/privacy-policy",
-    "https://salaryse.com/terms-conditions"
-]
-
-docs = [WebBaseLoader(url).load() for url in urls]
-docs_list = [doc for sublist in docs for doc in sublist]
-
-csv_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith(".csv")]
-csv_docs = []
-
-for file in csv_files:
-    df = pd.read_csv(file)
-    
-    for _, row in df.iterrows():
-        row_content = " ".join([str(value) for value in row[:-1]]) 
-        
-        try:
-            metadata_dict = ast.literal_eval(row['metadata'])  
-            metadata = {k: str(v) for k, v in metadata_dict.items()}  
-        except (ValueError, SyntaxError):
-            metadata = {}
-
-        document = Document(
-            page_content=row_content,
-            metadata={"source": file, "row_index": _, **metadata}  
-        )
-        
-        csv_docs.append(document)
-
-all_docs = docs_list + csv_docs
-
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=1000, chunk_overlap=100)
-doc_splits = []
-
-for doc in all_docs:
-    splits = text_splitter.split_documents([doc])
-    for split in splits:
-        split.metadata = doc.metadata  
-        doc_splits.append(split)
-
-embeddings = NomicEmbeddings(model="nomic-embed-text-v1.5", inference_mode="local")
-
-if not os.path.exists(persistent_directory):
-    db = Chroma.from_documents(documents=doc_splits, embedding=embeddings, persist_directory=persistent_directory)
+if LLM_BACKEND == "stub":
+    # Offline load tests: deterministic vectors of the Nomic dimension, no model download.
+    from stub_llm import StubEmbeddings
+    embeddings = StubEmbeddings()
 else:
-    db = Chroma(persist_directory=persistent_directory, embedding_function=embeddings)
+    embeddings = NomicEmbeddings(model="nomic-embed-text-v1.5", inference_mode="local")
+
+# The index is built and updated by `python rag_index.py`; importing this module only opens it.
+db = Chroma(persist_directory=persistent_directory, embedding_function=embeddings)
 
 retriever_chroma = db.as_retriever()
+
+# BM25 over the same chunks, maintained alongside the collection by rag_index.py.
+keyword_index = KeywordIndex.load(keyword_index_path)
+
+
+def keyword_index_version() -> float:
+    """Version stamp of the persisted BM25 index; rag_index.py rewrites the file after updating the collection."""
+    return os.path.getmtime(keyword_index_path) if os.path.exists(keyword_index_path) else 0.0
+
+
+_keyword_index_version = keyword_index_version()
+_keyword_index_reload: Optional[asyncio.Task] = None
+
+
+async def _reload_keyword_index() -> None:
+    global keyword_index
+    try:
+        keyword_index = await asyncio.to_thread(KeywordIndex.load, keyword_index_path)
+        print(f"Reloaded the keyword index: {len(keyword_index)} chunks.")
+    except Exception as e:
+        print(f"Reloading the keyword index failed: {str(e)}")
+
+
+def refresh_keyword_index() -> None:
+    """Reload the BM25 index in the background once rag_index.py has rewritten it; searches use the old one meanwhile."""
+    global _keyword_index_version, _keyword_index_reload
+    if _keyword_index_reload is not None and not _keyword_index_reload.done():
+        return
+    version = keyword_index_version()
+    if version != _keyword_index_version:
+        _keyword_index_version = version
+        _keyword_index_reload = asyncio.create_task(_reload_keyword_index())
+
+
+def index_version() -> str:
+    """Version stamp of the persisted Chroma index; changes whenever the collection is rewritten."""
+    sqlite_file = os.path.join(persistent_directory, "chroma.sqlite3")
+    mtime = os.path.getmtime(sqlite_file) if os.path.exists(sqlite_file) else 0
+    return f"{db._collection.count()}:{mtime}"
+
+
+# Predicts a metadata filter for a query from the tagged chunks in the collection.
+topic_predictor = TopicPredictor(db._collection, index_version=index_version)
+
+
+async def ahybrid_search(query: str, k: int = 4, fetch_k: int = 20, rrf_k: int = 60, keyword_weight: float = 1.0,
+                         filter: Optional[Dict[str, Any]] = None, embedding: Optional[List[float]] = None) -> List[Document]:
+    """
+    Hybrid retrieval: fuse the top `fetch_k` vector and BM25 results with reciprocal rank fusion.
+
+    Args:
+        query (str): The user query.
+        k (int): Number of documents returned.
+        fetch_k (int): Candidates taken from each of the vector and keyword searches.
+        rrf_k (int): Reciprocal rank fusion constant.
+        keyword_weight (float): Weight of the BM25 ranking relative to the vector ranking.
+        filter (dict): Chroma `where` metadata filter applied to both searches.
+        embedding (list): Precomputed query embedding, to avoid embedding the query again.
+
+    Returns:
+        list: The fused top `k` documents.
+    """
+    refresh_keyword_index()
+    if embedding is None:
+        embedding = await embeddings.aembed_query(query)
+    vector_docs = await db.asimilarity_search_by_vector(embedding, k=fetch_k, filter=filter)
+    keyword_docs = [doc for doc, _ in keyword_index.search(query, k=fetch_k, filter=filter)]
+    return reciprocal_rank_fusion([vector_docs, keyword_docs], k=k, rrf_k=rrf_k, weights=[1.0, keyword_weight])
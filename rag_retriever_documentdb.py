@@ -1,16 +1,15 @@
-from langchain_community.document_loaders import WebBaseLoader, CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores.documentdb import DocumentDBVectorSearch
 from pymongo import MongoClient
 from langchain_nomic.embeddings import NomicEmbeddings
-from langchain_core.documents import Document
+from rag_sources import load_web_documents, iter_csv_documents
+from ingest_pipeline import run_pipeline, format_stats
 import os
-import pandas as pd
 from dotenv import load_dotenv, find_dotenv
 import time
 import boto3
 from botocore.exceptions import ClientError
-import ast 
+import itertools
+import asyncio
 
 load_dotenv(find_dotenv())
 
@@ -46,66 +45,33 @@ db_dir = os.path.join(os.getcwd(), "db")
 data_dir = os.path.join(os.getcwd(), "data")
 
 
-urls = [
-    "https://www.salaryse.com/",
-    "https://salaryse.com/privacy-policy",
-    "https://salaryse.com/terms-conditions"
-]
-
-docs = [WebBaseLoader(url).load() for url in urls]
-docs_list = [doc for sublist in docs for doc in sublist]
-
-
-
-csv_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith(".csv")]
-csv_docs = []
-
-for file in csv_files:
-    loader = CSVLoader(file_path=file)
-    df = pd.read_csv(file)
-    
-    for _, row in df.iterrows():
-        row_content = " ".join([str(value) for value in row[:-1]])  
-        
-        
-        try:
-            metadata_dict = ast.literal_eval(row['metadata'])  
-            metadata = {k: str(v) for k, v in metadata_dict.items()}  
-        except (ValueError, SyntaxError):
-            metadata = {}
-
-        document = Document(
-            page_content=row_content,
-            metadata={"source": file, "row_index": _, **metadata}  
-        )
-        
-        csv_docs.append(document)
-
-all_docs = docs_list + csv_docs
-
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=1000, chunk_overlap=100)
-
-doc_splits = []
-for doc in all_docs:
-    splits = text_splitter.split_documents([doc])
-    for split in splits:
-        split.metadata = doc.metadata
-        doc_splits.append(split)
-
 embeddings = NomicEmbeddings(model="nomic-embed-text-v1.5", inference_mode="local")
 
 client = MongoClient(MONGO_URI)
 db = client[db_name]
 collection = db[collection_name]
 
-vectorstore = DocumentDBVectorSearch.from_documents(
-    documents=doc_splits,
-    embedding=embeddings,
-    collection=collection,
-    index_name=index_name,
-)
+vectorstore = DocumentDBVectorSearch(collection, embeddings, index_name=index_name)
+
+
+def write_chunks(chunks, vectors):
+    """Bulk-insert pre-embedded chunks in the layout DocumentDBVectorSearch reads."""
+    collection.insert_many([
+        {"textContent": chunk.page_content, "vectorContent": vector, **chunk.metadata}
+        for chunk, vector in zip(chunks, vectors)
+    ])
+
+
+def build_index(**pipeline_options):
+    """Load the web pages and data/*.csv, then split, embed and insert them through the ingestion pipeline."""
+    docs = itertools.chain(load_web_documents(), iter_csv_documents(data_dir))
+    stats = asyncio.run(run_pipeline(docs, embeddings, write_chunks, **pipeline_options))
+    vectorstore.create_index()
+    return stats
 
-vectorstore.create_index()
 
 retriever_documentdb = vectorstore.as_retriever()
 
+
+if __name__ == "__main__":
+    print(format_stats(build_index()))
@@ -0,0 +1,134 @@
+from langchain_community.document_loaders import WebBaseLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from typing import Dict, Iterator, List, Optional
+from dotenv import load_dotenv, find_dotenv
+import hashlib
+import json
+import os
+import pandas as pd
+import ast
+
+load_dotenv(find_dotenv())
+
+# tiktoken encoding chunk sizes and context budgets are measured in.
+TIKTOKEN_ENCODING = "gpt2"
+# CSV column holding a stable row ID; rows of files without it are keyed by a hash of their content.
+CSV_ID_COLUMN = os.getenv("RAG_CSV_ID_COLUMN", "id")
+
+urls = [
+    "https://www.salaryse.com/",
+    "https://salaryse.com/privacy-policy",
+    "https://salaryse.com/terms-conditions"
+]
+
+
+def load_web_documents(urls: List[str] = urls) -> List[Document]:
+    """Fetch the SalarySe web pages."""
+    docs = [WebBaseLoader(url).load() for url in urls]
+    return [doc for sublist in docs for doc in sublist]
+
+
+def parse_metadata(value) -> Dict[str, str]:
+    """Parse one `metadata` cell (a Python dict literal written by metadata_tagging.py); {} if it is not a dict."""
+    try:
+        metadata_dict = ast.literal_eval(value)
+    except (ValueError, SyntaxError, TypeError):
+        return {}
+    if not isinstance(metadata_dict, dict):
+        return {}
+    return {k: str(v) for k, v in metadata_dict.items()}
+
+
+def _csv_chunk_documents(file: str, df: pd.DataFrame, seen: Optional[Dict[str, int]] = None) -> Iterator[Document]:
+    # Page contents are built column-wise, and each distinct metadata string is parsed only once.
+    columns = [df[column].astype(str) for column in df.columns[:-1]]
+    contents = columns[0].str.cat(columns[1:], sep=" ") if columns else pd.Series("", index=df.index)
+
+    # Row keys do not depend on the row's position, so inserting or deleting rows leaves the
+    # others' keys (and chunk IDs) alone. Repeated keys get an occurrence suffix.
+    seen = {} if seen is None else seen
+    if CSV_ID_COLUMN in df.columns:
+        base_keys = df[CSV_ID_COLUMN].astype(str).tolist()
+    else:
+        base_keys = [hashlib.sha256(content.encode()).hexdigest()[:16] for content in contents.tolist()]
+    row_keys = []
+    for key in base_keys:
+        seen[key] = seen.get(key, 0) + 1
+        row_keys.append(key if seen[key] == 1 else f"{key}~{seen[key]}")
+
+    if "metadata" in df.columns:
+        parsed = {value: parse_metadata(value) for value in df["metadata"].unique()}
+        metadatas = df["metadata"].map(parsed).tolist()
+    else:
+        metadatas = [{}] * len(df)
+
+    for row_index, row_key, row_content, metadata in zip(df.index.tolist(), row_keys, contents.tolist(), metadatas):
+        yield Document(
+            page_content=row_content,
+            metadata={"source": file, "row_index": row_index, "row_key": row_key, **metadata}
+        )
+
+
+def iter_csv_documents(data_dir: str, chunksize: int = 10000) -> Iterator[Document]:
+    """
+    Lazily yield one Document per CSV row in `data_dir`.
+
+    Files are read `chunksize` rows at a time, as strings so a value renders the same whichever
+    chunk it lands in. All columns but the last are joined as the page content and the `metadata`
+    column is parsed into the document metadata, alongside `source`, `row_index` and `row_key`
+    (the `RAG_CSV_ID_COLUMN` value, or a hash of the page content).
+
+    Args:
+        data_dir (str): Directory with the tagged `.csv` files.
+        chunksize (int): Rows read and converted per batch.
+
+    Yields:
+        Document: One document per row.
+    """
+    csv_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir) if file.endswith(".csv")]
+
+    for file in csv_files:
+        seen: Dict[str, int] = {}
+        with pd.read_csv(file, chunksize=chunksize, dtype=str) as reader:
+            for df in reader:
+                yield from _csv_chunk_documents(file, df, seen)
+
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(encoding_name=TIKTOKEN_ENCODING, chunk_size=1000, chunk_overlap=100)
+
+
+def split_document(doc: Document, text_splitter: RecursiveCharacterTextSplitter) -> List[Document]:
+    """Split one document; every chunk keeps the parent document's metadata."""
+    splits = text_splitter.split_documents([doc])
+    for split in splits:
+        split.metadata = doc.metadata
+    return splits
+
+
+def source_key(doc: Document) -> str:
+    """Stable identifier of a source document: the URL for web pages, `<csv file name>#<row key>` for CSV rows."""
+    source = str(doc.metadata.get("source", ""))
+    if "row_key" in doc.metadata:
+        return f"{os.path.basename(source)}#{doc.metadata['row_key']}"
+    if "row_index" in doc.metadata:
+        return f"{os.path.basename(source)}#{doc.metadata['row_index']}"
+    return source
+
+
+def content_hash(doc: Document) -> str:
+    """
+    Hash of a document's text and metadata (ignoring the machine-specific `source` path).
+
+    A row that only moved changes its hash through `row_index`; its chunk IDs do not change, so
+    `rag_index.update_index` only updates their metadata.
+    """
+    metadata = {k: v for k, v in doc.metadata.items() if k != "source"}
+    payload = doc.page_content + "\0" + json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def chunk_id(key: str, chunk: Document) -> str:
+    """Content-derived vector store ID of a chunk of source `key`."""
+    return hashlib.sha256(f"{key}\0{chunk.page_content}".encode()).hexdigest()
@@ -0,0 +1,65 @@
+from typing import List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from dotenv import load_dotenv, find_dotenv
+import asyncio
+import os
+
+load_dotenv(find_dotenv())
+
+RERANK_ENABLED = os.getenv("RAG_RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_FETCH_K = int(os.getenv("RAG_RERANK_FETCH_K", "20"))
+RERANK_MIN_SCORE = float(os.getenv("RAG_RERANK_MIN_SCORE", "0.1"))
+RERANK_MIN_K = int(os.getenv("RAG_RERANK_MIN_K", "1"))
+RERANK_MAX_K = int(os.getenv("RAG_RERANK_MAX_K", "4"))
+RERANK_BATCH_SIZE = int(os.getenv("RAG_RERANK_BATCH_SIZE", "16"))
+
+
+class CrossEncoderReranker:
+    """
+    Local cross-encoder reranker (sentence-transformers, CPU).
+
+    The model is loaded on first use. Query/chunk pairs are scored in batches of `batch_size` on a
+    worker thread, so the event loop keeps serving other requests while a rerank runs.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, batch_size: int = RERANK_BATCH_SIZE, device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        """Relevance of each document to the query (0-1 for the default single-label model)."""
+        if not documents:
+            return []
+        pairs = [(query, doc.page_content) for doc in documents]
+        return [float(score) for score in self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)]
+
+    async def ascore(self, query: str, documents: Sequence[Document]) -> List[float]:
+        return await asyncio.to_thread(self.score, query, documents)
+
+
+def select_top(documents: Sequence[Document], scores: Sequence[float], min_score: float = RERANK_MIN_SCORE,
+               min_k: int = RERANK_MIN_K, max_k: int = RERANK_MAX_K) -> List[Tuple[Document, float]]:
+    """
+    Adaptive top-k: keep the documents scoring at least `min_score`, best first, but never fewer
+    than `min_k` or more than `max_k`.
+    """
+    ranked = sorted(zip(documents, scores), key=lambda pair: pair[1], reverse=True)
+    kept = [pair for pair in ranked if pair[1] >= min_score]
+    if len(kept) < min_k:
+        kept = ranked[:min_k]
+    return kept[:max_k]
+
+
+def build_reranker() -> Optional[CrossEncoderReranker]:
+    """The shared reranker, or None when reranking is disabled."""
+    return CrossEncoderReranker() if RERANK_ENABLED else None
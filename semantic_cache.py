@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+import time
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on query embeddings.
+
+    A lookup returns the cached answer of the most similar stored query if its cosine similarity
+    reaches `similarity_threshold`. Entries are evicted least-recently-used once `max_entries` or
+    `max_bytes` is exceeded, expire after `ttl_seconds`, and the whole cache is dropped when
+    `index_version()` changes (i.e. the retrieval index the answers were generated from changed).
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 32 * 1024 * 1024,
+        index_version: Optional[Callable[[], Any]] = None,
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.index_version = index_version
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys = []
+        self._bytes = 0
+        self._version = index_version() if index_version else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self) -> None:
+        if self.index_version is None:
+            return
+        version = self.index_version()
+        if version != self._version:
+            self._version = version
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        self._matrix = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]:
+            self._remove(key)
+
+    async def alookup(self, query: str) -> Optional[str]:
+        """
+        Return the cached answer for a semantically equivalent query, or None on a miss.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            str | None: The cached answer.
+        """
+        self._check_version()
+        self._expire()
+        embedding = await self._embed(query)
+
+        if self._entries:
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([self._entries[key]["embedding"] for key in self._keys])
+            similarities = self._matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                key = self._keys[best]
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]["answer"]
+
+        self.misses += 1
+        self._pending[query] = embedding
+        while len(self._pending) > 256:
+            self._pending.popitem(last=False)
+        return None
+
+    async def astore(self, query: str, answer: str) -> None:
+        """
+        Cache `answer` for `query`, reusing the embedding computed by the preceding miss if any.
+
+        Args:
+            query (str): The user query.
+            answer (str): The generated answer.
+        """
+        embedding = self._pending.pop(query, None)
+        if embedding is None:
+            embedding = await self._embed(query)
+        if query in self._entries:
+            self._remove(query)
+
+        size = embedding.nbytes + len(query.encode()) + len(answer.encode())
+        self._entries[query] = {"embedding": embedding, "answer": answer, "created": time.monotonic(), "size": size}
+        self._bytes += size
+        self._matrix = None
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        self._matrix = None
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,153 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from dotenv import load_dotenv, find_dotenv
+import asyncio
+import time
+import uuid
+import os
+
+load_dotenv(find_dotenv())
+
+SPECULATIVE_RETRIEVAL = os.getenv("RAG_SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+# Prefetches not claimed or cancelled within this time (e.g. the run was cancelled mid-graph) are dropped.
+PREFETCH_TTL_SECONDS = float(os.getenv("RAG_PREFETCH_TTL_SECONDS", "60"))
+
+
+class Prefetcher:
+    """
+    Registry of speculative retrievals started while the router is still deciding.
+
+    `start` runs a retrieval coroutine in a background task and returns an ID that travels through
+    the graph state (`prefetch_id`). `aclaim` hands the documents to `rag_agent.retrieve`, and
+    `cancel` abandons a prefetch the router did not need.
+
+    The counters report the latency saved (the part of each claimed retrieval that overlapped
+    routing) and the wasted work (run time of cancelled or unclaimed retrievals).
+    """
+
+    def __init__(self, ttl_seconds: float = PREFETCH_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._tasks: Dict[str, Tuple[asyncio.Task, float]] = {}
+        self._finished: Dict[asyncio.Task, float] = {}
+        self.counters = {"started": 0, "claimed": 0, "cancelled": 0, "expired": 0, "failed": 0,
+                         "saved_seconds": 0.0, "wasted_seconds": 0.0}
+
+    def start(self, retrieval: Awaitable[List[Document]]) -> str:
+        prefetch_id = uuid.uuid4().hex
+        task = asyncio.ensure_future(retrieval)
+        task.add_done_callback(self._on_done)
+        self._tasks[prefetch_id] = (task, time.perf_counter())
+        # Expire on a timer rather than on the next start, so an idle server does not keep abandoned prefetches.
+        asyncio.get_running_loop().call_later(self.ttl_seconds, self._expire, prefetch_id)
+        self.counters["started"] += 1
+        return prefetch_id
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled():
+            # Marks a failure as retrieved; aclaim still re-raises it when awaiting the task.
+            task.exception()
+            self._finished[task] = time.perf_counter()
+
+    def _discard(self, task: asyncio.Task, started: float) -> float:
+        """Cancel the task and return how long it ran."""
+        task.cancel()
+        elapsed = self._finished.pop(task, time.perf_counter()) - started
+        self.counters["wasted_seconds"] += elapsed
+        return elapsed
+
+    def _expire(self, prefetch_id: str) -> None:
+        """Drop a prefetch still unclaimed after `ttl_seconds` (no-op once claimed or cancelled)."""
+        entry = self._tasks.pop(prefetch_id, None)
+        if entry is not None:
+            self._discard(*entry)
+            self.counters["expired"] += 1
+
+    def cancel(self, prefetch_id: Optional[str]) -> None:
+        """Abandon a prefetch, counting its run time as wasted."""
+        entry = self._tasks.pop(prefetch_id, None) if prefetch_id else None
+        if entry is not None:
+            self._discard(*entry)
+            self.counters["cancelled"] += 1
+
+    async def aclaim(self, prefetch_id: Optional[str]) -> Optional[List[Document]]:
+        """
+        Wait for a prefetch and return its documents.
+
+        Returns:
+            list | None: The documents, or None if there is no such prefetch or it failed, in which
+                case the caller retrieves normally.
+        """
+        entry = self._tasks.pop(prefetch_id, None) if prefetch_id else None
+        if entry is None:
+            return None
+        task, started = entry
+        claimed = time.perf_counter()
+        try:
+            documents = await task
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        except Exception as e:
+            self._finished.pop(task, None)
+            self.counters["failed"] += 1
+            print(f"Speculative retrieval failed, retrieving again: {str(e)}")
+            return None
+
+        finished = self._finished.pop(task, time.perf_counter())
+        # Run sequentially, the retrieval would have started at `claimed` and taken finished - started.
+        saved = (finished - started) - max(0.0, finished - claimed)
+        self.counters["claimed"] += 1
+        self.counters["saved_seconds"] += saved
+        print(f"Speculative retrieval: {len(documents)} documents, {saved * 1000:.0f} ms saved")
+        return documents
+
+    def reset(self) -> None:
+        """Cancel every prefetch and zero the counters."""
+        for task, _ in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._finished.clear()
+        self.counters = {key: 0.0 if isinstance(value, float) else 0 for key, value in self.counters.items()}
+
+    def stats(self) -> dict:
+        claimed = self.counters["claimed"]
+        return {
+            "enabled": SPECULATIVE_RETRIEVAL,
+            "in_flight": len(self._tasks),
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()},
+            "avg_saved_ms": round(self.counters["saved_seconds"] / claimed * 1000, 1) if claimed else 0.0,
+            "hit_rate": round(claimed / self.counters["started"], 3) if self.counters["started"] else 0.0,
+        }
+
+
+prefetcher = Prefetcher()
+
+
+def speculative_router(router: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                       retrieval: Callable[[str], Awaitable[List[Document]]],
+                       needs_retrieval: Callable[[Dict[str, Any]], bool]):
+    """
+    Wrap a router node so retrieval for the query starts while the router decides.
+
+    Args:
+        router: Router node (e.g. `manager_agent`) returning a state update.
+        retrieval: Coroutine function retrieving documents for a query.
+        needs_retrieval: Whether the router's update leads to the RAG agent.
+
+    Returns:
+        Router node that adds `prefetch_id` to its update when the prefetch is kept, and cancels
+        the prefetch otherwise.
+    """
+    async def route(state: Dict[str, Any]) -> Dict[str, Any]:
+        prefetch_id = prefetcher.start(retrieval(state["query"]))
+        try:
+            update = await router(state)
+        except BaseException:
+            prefetcher.cancel(prefetch_id)
+            raise
+        if needs_retrieval(update):
+            return {**update, "prefetch_id": prefetch_id}
+        prefetcher.cancel(prefetch_id)
+        return update
+
+    return route
@@ -0,0 +1,222 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import WRITES_IDX_MAP, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple, get_checkpoint_metadata
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from dotenv import load_dotenv, find_dotenv
+import aiosqlite
+import asyncio
+import os
+
+load_dotenv(find_dotenv())
+
+CHECKPOINT_READERS = int(os.getenv("CHECKPOINT_READERS", "4"))
+CHECKPOINT_BATCH_WINDOW_MS = float(os.getenv("CHECKPOINT_BATCH_WINDOW_MS", "2"))
+CHECKPOINT_MAX_BATCH = int(os.getenv("CHECKPOINT_MAX_BATCH", "256"))
+
+# WAL lets readers run while the writer commits; NORMAL sync is durable across app crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA busy_timeout=5000;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-20000;",
+    "PRAGMA mmap_size=268435456;",
+)
+
+PUT_CHECKPOINT = ("INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+PUT_WRITES = "INSERT OR {} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+async def _connect(path: str, read_only: bool = False) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(path)
+    for pragma in PRAGMAS + (("PRAGMA query_only=ON;",) if read_only else ()):
+        async with conn.execute(pragma) as cursor:
+            await cursor.fetchall()
+    return conn
+
+
+class PooledSqliteSaver(AsyncSqliteSaver):
+    """
+    AsyncSqliteSaver with a reader connection pool and group-committed writes.
+
+    Reads (`aget_tuple`, `alist`) run on a pool of `readers` read-only connections, so they no
+    longer queue behind writes. All writes go through a single writer task that drains the queue of
+    pending statements (waiting up to `batch_window_ms` for more) and executes up to `max_batch`
+    of them in one transaction. Callers resume only after their write is committed, so a
+    checkpoint is visible to every reader as soon as `aput` returns. Queries are those of
+    `AsyncSqliteSaver`; only the connection handling differs.
+
+    Create it with `await PooledSqliteSaver.create(path)` and close it with `aclose()`.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, path: str, readers: int = CHECKPOINT_READERS,
+                 batch_window_ms: float = CHECKPOINT_BATCH_WINDOW_MS, max_batch: int = CHECKPOINT_MAX_BATCH, **kwargs):
+        super().__init__(conn, **kwargs)
+        self.path = path
+        self.readers = readers
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self._reader_pool: asyncio.Queue = asyncio.Queue()
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._write_queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        # Held while a batch is written; maintenance (pruning, VACUUM) takes it to use the writer connection.
+        self.writer_lock = asyncio.Lock()
+        self.batches = 0
+        self.batched_writes = 0
+
+    @classmethod
+    async def create(cls, path: str, **kwargs) -> "PooledSqliteSaver":
+        """Open the writer and reader connections, create the tables and start the writer task."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        saver = cls(await _connect(path), path, **kwargs)
+        await saver.setup()
+        for _ in range(saver.readers):
+            reader = AsyncSqliteSaver(await _connect(path, read_only=True), serde=saver.serde)
+            # The tables were created through the writer; setup() would try to write on a read-only connection.
+            reader.is_setup = True
+            saver._reader_conns.append(reader.conn)
+            saver._reader_pool.put_nowait(reader)
+        saver._writer_task = asyncio.create_task(saver._write_loop())
+        saver._writer_task.add_done_callback(saver._on_writer_done)
+        return saver
+
+    async def aclose(self) -> None:
+        """Commit pending writes, stop the writer task and close all connections."""
+        if self._writer_task is not None:
+            await self._write_queue.join()
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+        for conn in self._reader_conns:
+            await conn.close()
+        await self.conn.close()
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[AsyncSqliteSaver]:
+        reader = await self._reader_pool.get()
+        try:
+            yield reader
+        finally:
+            self._reader_pool.put_nowait(reader)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        async with self._reader() as reader:
+            return await reader.aget_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs) -> AsyncIterator[CheckpointTuple]:
+        async with self._reader() as reader:
+            async for checkpoint_tuple in reader.alist(config, **kwargs):
+                yield checkpoint_tuple
+
+    async def awrite(self, sql: str, params: Sequence[Any] = (), many: bool = False) -> None:
+        """Queue a write statement and wait until the batch containing it is committed."""
+        if self._writer_task is not None and self._writer_task.done():
+            raise RuntimeError("Checkpoint writer is not running.")
+        future = self.loop.create_future()
+        await self._write_queue.put((sql, params, many, future))
+        await future
+
+    async def _execute_batch(self, batch: List[Tuple[str, Any, bool, asyncio.Future]]) -> None:
+        for sql, params, many, _ in batch:
+            execute = self.conn.executemany if many else self.conn.execute
+            async with execute(sql, params):
+                pass
+        await self.conn.commit()
+
+    async def _commit(self, batch: List[Tuple[str, Any, bool, asyncio.Future]]) -> List[Optional[Exception]]:
+        """Commit a batch; returns the error of each statement (None if it was committed)."""
+        try:
+            await self._execute_batch(batch)
+            return [None] * len(batch)
+        except Exception:
+            # Isolate the failing statement: commit the others one by one.
+            await self.conn.rollback()
+            results = []
+            for item in batch:
+                try:
+                    await self._execute_batch([item])
+                    results.append(None)
+                except Exception as e:
+                    await self.conn.rollback()
+                    results.append(e)
+            return results
+
+    def _finish(self, batch: List[Tuple[str, Any, bool, asyncio.Future]], results: List[Optional[BaseException]]) -> None:
+        for (_, _, _, future), error in zip(batch, results):
+            if not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+            self._write_queue.task_done()
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._write_queue.get()]
+            try:
+                if self.batch_window:
+                    await asyncio.sleep(self.batch_window)
+                while len(batch) < self.max_batch and not self._write_queue.empty():
+                    batch.append(self._write_queue.get_nowait())
+                async with self.writer_lock:
+                    results = await self._commit(batch)
+            except asyncio.CancelledError:
+                self._finish(batch, [RuntimeError("Checkpoint writer stopped.")] * len(batch))
+                raise
+            except Exception as e:
+                # E.g. a failed rollback: fail this batch's writes but keep serving the next ones.
+                print(f"Checkpoint writer failed on a batch of {len(batch)} writes: {str(e)}")
+                results = [e] * len(batch)
+                try:
+                    await self.conn.rollback()
+                except Exception:
+                    pass
+            self._finish(batch, results)
+            self.batches += 1
+            self.batched_writes += len(batch)
+
+    def _on_writer_done(self, task: asyncio.Task) -> None:
+        """Report a crashed writer and fail the queued writes, so their callers do not wait forever."""
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            print(f"Checkpoint writer stopped: {str(error)}")
+        while not self._write_queue.empty():
+            self._finish([self._write_queue.get_nowait()], [error or RuntimeError("Checkpoint writer stopped.")])
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = self.jsonplus_serde.dumps(get_checkpoint_metadata(config, metadata))
+        await self.awrite(PUT_CHECKPOINT, (str(thread_id), checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                                           type_, serialized_checkpoint, serialized_metadata))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        query = PUT_WRITES.format("REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "IGNORE")
+        await self.awrite(query, [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ], many=True)
+
+    def stats(self) -> dict:
+        """Writer batching counters."""
+        return {
+            "readers": self.readers,
+            "write_batches": self.batches,
+            "writes": self.batched_writes,
+            "avg_batch_size": self.batched_writes / self.batches if self.batches else 0.0,
+            "queued_writes": self._write_queue.qsize(),
+        }
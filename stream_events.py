@@ -0,0 +1,87 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from langchain_core.messages import HumanMessage
+from api_catalog import catalog
+import asyncio
+import json
+
+
+# Graph nodes (innermost LangGraph node names) whose LLM tokens are forwarded to the client.
+# Router and summarizer nodes are left out since their output is a label or JSON, not an answer.
+# API agent nodes are named after their catalog product.
+TOKEN_NODES = {"chat", "generate", *catalog}
+
+ROUTING_NODES = {"manager": "intent", "api_supervisor": "api_intent"}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def final_response(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the same payload `/ask` returns from the final graph state."""
+    messages = state.get("messages", []) if isinstance(state, dict) else []
+    payload = {"response": messages[-1].content if messages else "No output was generated."}
+    if state.get("api"):
+        payload["api"] = state["api"]
+    return payload
+
+
+async def stream_graph_events(graph, query: str, thread_id: str, callbacks: Optional[List[Any]] = None) -> AsyncIterator[str]:
+    """
+    Run the agent graph and yield its progress as Server-Sent Events.
+
+    Events are emitted in the order the graph produces them: `route` when a router node has
+    decided, `retrieval` when the RAG retriever has finished, `token` for every LLM chunk of an
+    answering node, then `done` with the final response (or `error`). If the client disconnects,
+    the surrounding task is cancelled and the cancellation propagates into the running graph so
+    in-flight Bedrock/Ollama calls are abandoned.
+
+    Args:
+        graph: Compiled agent graph.
+        query (str): User query.
+        thread_id (str): Conversation thread ID used by the checkpointer.
+        callbacks (list): Callback handlers for the run, e.g. `metrics.metrics_handler`.
+
+    Yields:
+        str: Encoded SSE frames.
+    """
+    query_payload = {
+        "messages": [HumanMessage(content=query)],
+        "query": query
+    }
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": callbacks or []}
+
+    events = graph.astream_events(query_payload, config=config, version="v2")
+    try:
+        async for event in events:
+            kind = event["event"]
+            name = event.get("name", "")
+            node = event.get("metadata", {}).get("langgraph_node")
+            data = event.get("data", {})
+
+            if kind == "on_chat_model_stream" and node in TOKEN_NODES:
+                content = data["chunk"].content
+                if content:
+                    yield format_sse("token", {"node": node, "content": content})
+
+            elif kind == "on_chain_end" and name in ROUTING_NODES and node == name:
+                output = data.get("output") or {}
+                yield format_sse("route", {"node": name, "target": output.get(ROUTING_NODES[name], "")})
+
+            elif kind == "on_chain_end" and name == "retrieve" and node == name:
+                output = data.get("output") or {}
+                yield format_sse("retrieval", {"documents": len(output.get("documents", []))})
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                yield format_sse("done", final_response(data.get("output") or {}))
+
+    except asyncio.CancelledError:
+        print(f"Client disconnected, cancelling stream for thread {thread_id}.")
+        raise
+    except Exception as e:
+        import traceback
+        print(f"Error streaming query: {str(e)}\n{traceback.format_exc()}")
+        yield format_sse("error", {"detail": "An error occurred while processing your request."})
+    finally:
+        await events.aclose()
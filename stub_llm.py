@@ -0,0 +1,191 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import ensure_config
+from dotenv import load_dotenv, find_dotenv
+from pydantic import Field, PrivateAttr
+import numpy as np
+import hashlib
+import asyncio
+import random
+import time
+import yaml
+import os
+import re
+
+load_dotenv(find_dotenv())
+
+STUB_CONFIG_PATH = os.getenv("STUB_LLM_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_llm.yaml"))
+STUB_EMBEDDING_DIM = int(os.getenv("STUB_EMBEDDING_DIM", "768"))
+
+URL_PATTERN = re.compile(r"'(https?://[^'\s]+)'")
+
+
+def load_stub_config(path: str = STUB_CONFIG_PATH) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def sample_latency(spec: Optional[Dict[str, Any]], rng: random.Random) -> float:
+    """
+    Draw a latency in seconds from a `latency` spec of `stub_llm.yaml`.
+
+    Supported distributions: `constant` (`ms`), `uniform` (`min_ms`, `max_ms`), `normal`
+    (`mean_ms`, `std_ms`) and `lognormal` (`median_ms`, `sigma`).
+    """
+    if not spec:
+        return 0.0
+    distribution = spec.get("distribution", "constant")
+    if distribution == "constant":
+        ms = spec.get("ms", 0)
+    elif distribution == "uniform":
+        ms = rng.uniform(spec["min_ms"], spec["max_ms"])
+    elif distribution == "normal":
+        ms = rng.gauss(spec["mean_ms"], spec["std_ms"])
+    elif distribution == "lognormal":
+        ms = spec["median_ms"] * float(np.exp(rng.gauss(0, spec.get("sigma", 0.25))))
+    else:
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+    return max(ms, 0) / 1000
+
+
+def stable_hash(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\x1f".join(parts).encode()).digest()[:8], "big")
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for load tests (`LLM_BACKEND=stub`).
+
+    The answer depends on the graph node the call comes from (the `langgraph_node` run metadata),
+    or, outside a graph, on the first node section whose `match` strings occur in the prompt; the
+    `default` section applies otherwise. A section's `responses` are either a list of texts or a
+    mapping of text to weight. Weighted responses that appear quoted in the prompt (the labels a
+    router prompt offers) are preferred over the others. The choice is a hash of the seed and
+    the prompt, so the same query always gets the same answer. `{api}` in a response is
+    replaced by the first quoted URL of the prompt.
+
+    Each call sleeps for a latency drawn from the section's distribution. When the caller
+    streams, the latency is time to first token, and the text is then emitted word by word at
+    `tokens_per_second`. Token usage is reported as word counts of the prompt and the answer.
+    """
+
+    model: str = "stub"
+    config: Dict[str, Any] = Field(default_factory=load_stub_config)
+    seed: Optional[int] = None
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed if self.seed is not None else self.config.get("seed", 0))
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def _section(self, prompt: str, node: Optional[str]) -> Dict[str, Any]:
+        nodes = self.config.get("nodes", {})
+        if node not in nodes:
+            node = next((name for name, spec in nodes.items()
+                         if any(text in prompt for text in spec.get("match", []))), None)
+        return {**self.config.get("default", {}), **nodes.get(node, {})}
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(text.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _respond(self, messages: List[BaseMessage], run_manager) -> Tuple[str, Dict[str, Any]]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        # Implicit streaming (astream_events) calls _astream without a run manager; the run config still has the node.
+        metadata = getattr(run_manager, "metadata", None) or ensure_config().get("metadata", {})
+        node = metadata.get("langgraph_node")
+        section = self._section(prompt, node)
+
+        responses = section.get("responses") or [""]
+        if isinstance(responses, dict):
+            offered = {text: weight for text, weight in responses.items() if f'"{text}"' in prompt}
+            responses = offered or responses
+            texts, weights = list(responses), list(responses.values())
+        else:
+            texts, weights = list(responses), [1] * len(responses)
+
+        point = stable_hash(str(self.config.get("seed", 0)), prompt) / 2 ** 64 * sum(weights)
+        for text, weight in zip(texts, weights):
+            point -= weight
+            if point < 0:
+                break
+
+        if "{api}" in text:
+            url = URL_PATTERN.search(prompt)
+            text = text.replace("{api}", url.group(1) if url else "No API Found")
+        return text, section
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=self._usage(messages, text)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text, section = self._respond(messages, run_manager)
+        time.sleep(sample_latency(section.get("latency"), self._rng))
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text, section = self._respond(messages, run_manager)
+        await asyncio.sleep(sample_latency(section.get("latency"), self._rng))
+        return self._result(messages, text)
+
+    def _chunks(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text) or [""]
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text, section = self._respond(messages, run_manager)
+        time.sleep(sample_latency(section.get("latency"), self._rng))
+        tokens_per_second = section.get("tokens_per_second") or 0
+        pieces = self._chunks(text)
+        for i, piece in enumerate(pieces):
+            if i and tokens_per_second:
+                time.sleep(1 / tokens_per_second)
+            # Chunk usage is summed by the caller, so only the last chunk carries it.
+            usage = self._usage(messages, text) if i == len(pieces) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text, section = self._respond(messages, run_manager)
+        await asyncio.sleep(sample_latency(section.get("latency"), self._rng))
+        tokens_per_second = section.get("tokens_per_second") or 0
+        pieces = self._chunks(text)
+        for i, piece in enumerate(pieces):
+            if i and tokens_per_second:
+                await asyncio.sleep(1 / tokens_per_second)
+            usage = self._usage(messages, text) if i == len(pieces) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+
+
+class StubEmbeddings(Embeddings):
+    """Deterministic offline embeddings: unit vectors seeded by a hash of the text."""
+
+    def __init__(self, dim: int = STUB_EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.random.default_rng(stable_hash(text)).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def create_stub_model(model: str = "stub", **params) -> StubChatModel:
+    """Stub model for the registry. Sampling `params` are ignored; `streaming: false` in the config turns token streaming off."""
+    config = load_stub_config()
+    return StubChatModel(model=model, config=config, disable_streaming=not config.get("streaming", True))
@@ -1,58 +1,123 @@
 from GlobalState import GlobalState
+from llm_registry import get_llm
 from langchain_core.messages import RemoveMessage, AIMessage
 from dotenv import load_dotenv, find_dotenv
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-from langchain_aws import ChatBedrock
 from langchain_core.prompts import PromptTemplate
+from langchain_core.messages import AnyMessage
 from langgraph.graph import END
+from context_builder import get_encoder
+from typing import List, Tuple
+import os
 
 load_dotenv(find_dotenv())
 
-summary_llm = ChatBedrock(credentials_profile_name="default",
-                          model_id="meta.llama3-8b-instruct-v1:0",
-                          model_kwargs=dict(temperature=0.7))
+# Summarize once the history exceeds SUMMARY_TRIGGER_MESSAGES, keeping the last SUMMARY_KEEP_MESSAGES verbatim.
+SUMMARY_TRIGGER_MESSAGES = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "6"))
+SUMMARY_KEEP_MESSAGES = int(os.getenv("SUMMARY_KEEP_MESSAGES", "3"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+SUMMARY_INPUT_MAX_TOKENS = int(os.getenv("SUMMARY_INPUT_MAX_TOKENS", "1500"))
+# "inline" summarizes before routing; "background" after the response, see background_summarizer.py.
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "inline")
+
+summary_llm = get_llm("bedrock", "meta.llama3-8b-instruct-v1:0", temperature=0.7)
+
+def format_messages(messages: List[AnyMessage], max_tokens: int = SUMMARY_INPUT_MAX_TOKENS) -> Tuple[str, int]:
+    """
+    Render the oldest messages that fit in `max_tokens` as `role: content` lines.
+
+    A first message longer than the whole budget is cut to it, so every call makes progress and
+    the rendered text never exceeds the budget.
+
+    Returns:
+        tuple: The rendered text and the number of messages it covers.
+    """
+    encoder = get_encoder()
+    lines: List[str] = []
+    used = 0
+    for message in messages:
+        line = f"{message.type}: {message.content}"
+        tokens = encoder.encode(line, disallowed_special=())
+        if used + len(tokens) > max_tokens:
+            if not lines:
+                lines.append(encoder.decode(tokens[:max_tokens]))
+            break
+        lines.append(line)
+        used += len(tokens) + 1
+    return "\n".join(lines), len(lines)
+
+
+def truncate_summary(summary: str, max_tokens: int = SUMMARY_MAX_TOKENS) -> str:
+    tokens = get_encoder().encode(summary, disallowed_special=())
+    return summary if len(tokens) <= max_tokens else get_encoder().decode(tokens[:max_tokens])
+
 
 async def summarize_conversations(state: GlobalState) -> GlobalState:
     """
-    Summarize the conversation history.
+    Fold the messages that are about to leave the history into the running summary.
+
+    Only messages older than the last `SUMMARY_KEEP_MESSAGES` are summarized, together with the
+    previous summary, and then removed from the state. Evicted messages that do not fit in
+    `SUMMARY_INPUT_MAX_TOKENS` are folded in further passes, oldest first, so each message is
+    summarized exactly once and every prompt stays bounded by `SUMMARY_MAX_TOKENS` +
+    `SUMMARY_INPUT_MAX_TOKENS` regardless of the conversation length. Only messages that reached
+    the summary are removed: if an LLM call fails, the remaining messages are kept and folded on a
+    later turn.
+
+    Args:
+        state (GlobalState): Current state with `messages` and the previous `summary`.
+
+    Returns:
+        GlobalState: The new `summary` and removals of the folded messages.
     """
-    
+    messages = state.get("messages", [])
+    evicted = messages[:-SUMMARY_KEEP_MESSAGES] if SUMMARY_KEEP_MESSAGES else messages
+    if not evicted:
+        return {}
+
     prompt = PromptTemplate(
         template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
         You are an AI assistant proficient in summarizing conversation history.
-        You will be provided with the conversation history and your task is to generate a concise summary.
-        Ensure the summary captures the essence of the conversation and is clear and concise.
+        You will be provided with the summary of the conversation so far and the messages that followed it.
+        Your task is to update the summary so it also covers the new messages.
+        Keep the facts, requests and answers that matter for the rest of the conversation, drop small talk, and use at most {max_words} words.
         return summary as a json object with the key 'summary'.
-        The previous conversation history can be accessed through the 'messages' key in the state.
 
-        messages: {messages}
+        summary so far: {summary}
+        new messages:
+        {messages}
         Response:
         <|eot_id|><|start_header_id|>assistant<|end_header_id|>""",
-        input_variables=["messages"]
+        input_variables=["summary", "messages", "max_words"]
     )
-    
+
     summary_chain = prompt | summary_llm | JsonOutputParser()
-    messages = state.get("messages", [])
-    try:
-        response = await summary_chain.ainvoke({"messages": messages})
-    except Exception as e:
-        response = f"I'm sorry, an error occurred while generating the response: {str(e)}"
-    
-    summary = response["summary"].strip()
-    
-    updated_state = state.copy()
-    updated_state["messages"] = updated_state.get("messages", []) + [AIMessage(content=summary)]
-    
-    delete_messages = [RemoveMessage(id=m.id) for m in updated_state["messages"][:-3]]
-    
-    return {"summary": summary, "messages": delete_messages}
+    summary = state.get("summary", "")
+    folded = 0
+    while folded < len(evicted):
+        text, count = format_messages(evicted[folded:])
+        try:
+            response = await summary_chain.ainvoke({
+                "summary": summary or "(none yet)",
+                "messages": text,
+                "max_words": int(SUMMARY_MAX_TOKENS * 0.75),
+            })
+            summary = truncate_summary(str(response["summary"]).strip())
+        except Exception as e:
+            print(f"Summarization failed, keeping {len(evicted) - folded} messages for a later turn: {str(e)}")
+            break
+        folded += count
+
+    if not folded:
+        return {}
+    return {"summary": summary, "messages": [RemoveMessage(id=m.id) for m in evicted[:folded]]}
 
 def summarization_intent(state: GlobalState) -> str:
     """Return the next node to execute."""
     
     messages = state.get("messages", [])
     
-    if len(messages) > 6:
+    if len(messages) > SUMMARY_TRIGGER_MESSAGES:
         return "summarize_conversations"
     
     return "manager"
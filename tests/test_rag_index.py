@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
+from langchain_chroma import Chroma
+from keyword_index import KeywordIndex
+from rag_index import update_index
+from rag_sources import iter_csv_documents
+from stub_llm import StubEmbeddings
+
+
+def write_csv(data_dir: str, topics: list) -> None:
+    pd.DataFrame({
+        "question": [f"question {i}" for i in range(len(topics))],
+        "answer": [f"answer {i}" for i in range(len(topics))],
+        "metadata": [str({"primary_topic": topic}) for topic in topics],
+    }).to_csv(os.path.join(data_dir, "faq.csv"), index=False)
+
+
+def test_metadata_only_change_updates_indexed_chunks(tmp_path):
+    data_dir, manifest_path = str(tmp_path / "data"), str(tmp_path / "manifest.json")
+    os.makedirs(data_dir)
+    db = Chroma(collection_name="test", persist_directory=str(tmp_path / "chroma"), embedding_function=StubEmbeddings(dim=16))
+    keyword_index = KeywordIndex()
+
+    write_csv(data_dir, ["Errors", "UPI"])
+    first = update_index(db, iter_csv_documents(data_dir), manifest_path, keyword_index=keyword_index, split=False)
+    assert first["added"] == 2
+
+    write_csv(data_dir, ["Credit Card / Card", "UPI"])
+    second = update_index(db, iter_csv_documents(data_dir), manifest_path, keyword_index=keyword_index, split=False)
+
+    assert second["added"] == 0 and second["deleted"] == 0 and second["updated"] == 1
+    stored = db._collection.get(where={"primary_topic": "Credit Card / Card"})
+    assert len(stored["ids"]) == 1
+    assert not db._collection.get(where={"primary_topic": "Errors"})["ids"]
+    assert [doc.metadata["primary_topic"] for doc, _ in keyword_index.search("question 0", k=1)] == ["Credit Card / Card"]
+
+
+def test_moved_row_keeps_its_chunk_and_gets_its_new_row_index(tmp_path):
+    data_dir, manifest_path = str(tmp_path / "data"), str(tmp_path / "manifest.json")
+    os.makedirs(data_dir)
+    db = Chroma(collection_name="test", persist_directory=str(tmp_path / "chroma"), embedding_function=StubEmbeddings(dim=16))
+
+    write_csv(data_dir, ["Errors", "UPI"])
+    update_index(db, iter_csv_documents(data_dir), manifest_path, split=False)
+    ids = set(db._collection.get()["ids"])
+
+    df = pd.read_csv(os.path.join(data_dir, "faq.csv"))
+    df.iloc[::-1].to_csv(os.path.join(data_dir, "faq.csv"), index=False)
+    stats = update_index(db, iter_csv_documents(data_dir), manifest_path, split=False)
+
+    assert stats["added"] == 0 and stats["deleted"] == 0
+    assert set(db._collection.get()["ids"]) == ids
+    assert db._collection.get(where={"primary_topic": "Errors"})["metadatas"][0]["row_index"] == 1
@@ -0,0 +1,144 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv, find_dotenv
+import numpy as np
+import asyncio
+import os
+
+load_dotenv(find_dotenv())
+
+FILTER_FIELDS = [field.strip() for field in os.getenv("RAG_FILTER_FIELDS", "primary_topic,financial_product,document_type").split(",") if field.strip()]
+FILTER_MIN_SIMILARITY = float(os.getenv("RAG_FILTER_MIN_SIMILARITY", "0.3"))
+FILTER_MIN_MARGIN = float(os.getenv("RAG_FILTER_MIN_MARGIN", "0.05"))
+FILTER_MIN_SUPPORT = int(os.getenv("RAG_FILTER_MIN_SUPPORT", "3"))
+
+# Tag values that do not narrow anything down and are never used as filters.
+CATCH_ALL_VALUES = {"", "none", "nan", "null", "other", "others", "others (if not listed)", "miscellaneous"}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class TopicPredictor:
+    """
+    Predict a Chroma metadata filter for a query from the tags written by metadata_tagging.py.
+
+    For every filter field (e.g. `primary_topic`), each tag value with at least `min_support` chunks
+    is represented by the normalized mean embedding of those chunks, read from the collection
+    itself. A query vector is assigned a field's best value only when its cosine similarity is at
+    least `min_similarity` and beats the runner-up by `min_margin`; uncertain fields are left out of
+    the filter.
+
+    Training pages through the whole collection, so it runs in a background task (`refresh`) and
+    never on a query: until the first training finishes `apredict` returns None (unfiltered), and
+    when `index_version()` changes the old centroids are used until the new ones are ready.
+    """
+
+    def __init__(
+        self,
+        collection,
+        fields: Sequence[str] = FILTER_FIELDS,
+        min_similarity: float = FILTER_MIN_SIMILARITY,
+        min_margin: float = FILTER_MIN_MARGIN,
+        min_support: int = FILTER_MIN_SUPPORT,
+        index_version: Optional[Callable[[], Any]] = None,
+    ):
+        self.collection = collection
+        self.fields = list(fields)
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.min_support = min_support
+        self.index_version = index_version
+        self.labels: Dict[str, List[str]] = {}
+        self.centroids: Dict[str, np.ndarray] = {}
+        self._version = None
+        self._trained = False
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _compute(self, batch_size: int = 5000) -> Tuple[Dict[str, List[str]], Dict[str, np.ndarray]]:
+        """Per-value labels and centroids, by paging through the collection's embeddings and metadata."""
+        sums: Dict[str, Dict[str, np.ndarray]] = {field: {} for field in self.fields}
+        counts: Dict[str, Dict[str, int]] = {field: {} for field in self.fields}
+
+        total = self.collection.count()
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(include=["embeddings", "metadatas"], limit=batch_size, offset=offset)
+            vectors = _normalize(np.asarray(batch["embeddings"], dtype=np.float32))
+            for vector, metadata in zip(vectors, batch["metadatas"]):
+                for field in self.fields:
+                    value = (metadata or {}).get(field)
+                    if value is None or str(value).strip().lower() in CATCH_ALL_VALUES:
+                        continue
+                    sums[field][value] = sums[field].get(value, 0) + vector
+                    counts[field][value] = counts[field].get(value, 0) + 1
+
+        field_labels, centroids = {}, {}
+        for field in self.fields:
+            labels = [value for value, count in counts[field].items() if count >= self.min_support]
+            if len(labels) > 1:
+                field_labels[field] = labels
+                centroids[field] = _normalize(np.stack([sums[field][value] for value in labels]))
+        return field_labels, centroids
+
+    def train(self, batch_size: int = 5000) -> None:
+        """Compute per-value centroids synchronously."""
+        self.labels, self.centroids = self._compute(batch_size)
+        self._version = self.index_version() if self.index_version else None
+        self._trained = True
+
+    async def atrain(self) -> None:
+        """Train once, and again whenever the index version changes."""
+        async with self._lock:
+            version = self.index_version() if self.index_version else None
+            if self._trained and version == self._version:
+                return
+            # Centroids are swapped in on the event loop, so a concurrent apredict never sees half of them.
+            self.labels, self.centroids = await asyncio.to_thread(self._compute)
+            self._version = version
+            self._trained = True
+
+    def _on_trained(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Topic predictor training failed: {str(task.exception())}")
+
+    def refresh(self) -> Optional[asyncio.Task]:
+        """Start training in the background unless the centroids are current or training is already running."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        version = self.index_version() if self.index_version else None
+        if self._trained and version == self._version:
+            return None
+        self._task = asyncio.create_task(self.atrain())
+        self._task.add_done_callback(self._on_trained)
+        return self._task
+
+    async def apredict(self, query_vector: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """
+        Turn a query embedding into a Chroma `where` filter.
+
+        Args:
+            query_vector: Embedding of the user query.
+
+        Returns:
+            dict: A `where` filter over the confidently predicted fields, or None if there are none
+                or the predictor is not trained yet.
+        """
+        self.refresh()
+        if not self._trained:
+            return None
+        vector = _normalize(np.asarray(query_vector, dtype=np.float32))
+        conditions = []
+        for field, centroids in self.centroids.items():
+            scores = centroids @ vector
+            order = np.argsort(scores)[::-1]
+            best = float(scores[order[0]])
+            margin = best - float(scores[order[1]])
+            if best >= self.min_similarity and margin >= self.min_margin:
+                conditions.append({field: self.labels[field][order[0]]})
+
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+